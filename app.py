@@ -1,8 +1,15 @@
 
+import os
+
 import streamlit as st
 
+LOGO_URL = "https://www.quantuniversity.com/assets/img/logo5.jpg"
+# Bundled copy (assets/, shipped in the image) so reruns do not depend on the
+# external site; falls back to the URL when it is missing
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'logo5.jpg')
+
 st.set_page_config(page_title="QuLab: Key Risk Indicator (KRIs) Framework Simulator", layout="wide")
-st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
+st.sidebar.image(LOGO_PATH if os.path.exists(LOGO_PATH) else LOGO_URL)
 st.sidebar.divider()
 st.title("QuLab: Key Risk Indicator (KRIs) Framework Simulator")
 st.divider()
@@ -1,72 +1,234 @@
+import contextlib
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
+
+from kri_engine import simulation
+from kri_engine.breaches import BreachIndex
+from kri_engine.cache import ResultCache, pipeline_key
+from kri_engine.calibration import calibrate, threshold_grid
+from kri_engine.cube import ALL_LOCATIONS, MEASURES, KRICube
+from kri_engine.downsample import downsample_frame, minmax_indices, quantile_band
+from kri_engine.kpis import DERIVED_KRIS
+from kri_engine.pipeline import ScenarioPipeline
+from kri_engine.profiling import RunProfile, capture_profile, current_rss
+from kri_engine.status import (AMBER, DEFAULT_THRESHOLDS, FALLBACK_THRESHOLDS,
+                               RED, assess_risk, status_column)
+from kri_engine.windows import WINDOW_KRIS, WINDOW_THRESHOLDS
 
 # -------------------------------------------------------------
 # Helper functions (taken from your original pages)
 # -------------------------------------------------------------
-def run_page1():
-    @st.cache_data
-    def generate_synthetic_data(duration, num_locations,
-                                base_values, volatility, trend_factors):
-        """Return a DataFrame with synthetic operational metrics."""
-        dates = pd.date_range(start='2023-01-01', periods=duration)
-        data = []
-        for loc in range(num_locations):
-            for date in dates:
-                days = (date - dates[0]).days
-                trades = base_values['trades'] * (
-                    1 + np.random.normal(0, volatility)
-                    + trend_factors['trades'] * days
-                )
-                unreconciled = base_values['unreconciled'] * (
-                    1 + np.random.normal(0, volatility)
-                    + trend_factors['unreconciled'] * days
-                )
-                staff = base_values['staff'] * (
-                    1 + np.random.normal(0, volatility)
-                    + trend_factors['staff'] * days
-                )
-
-                data.append({
-                    'Date': date,
-                    'Location': f'Location {loc+1}',
-                    'Volume of Trades per day': max(0, int(trades)),
-                    'Number of unreconciled trades > 5 days': max(0, int(unreconciled)),
-                    'Staff turnover': max(0, int(staff)),
-                    'System outages': np.random.randint(0, 2),
-                    'Number of Back Office Staff': max(1, int(staff*5))
-                })
-        return pd.DataFrame(data)
-
-
-    def calculate_kpis(df):
-        """Add derived KRI columns."""
-        if df.empty:
-            return df
-        df['Unreconciled items as % of volume'] = (
-            df['Number of unreconciled trades > 5 days']
-            / df['Volume of Trades per day'].replace(0, np.nan)
-        ).fillna(0) * 100
-
-        df['Volume per staff'] = (
-            df['Volume of Trades per day']
-            / df['Number of Back Office Staff'].replace(0, np.nan)
-        ).fillna(0)
-        return df
-
-
-    def assign_kri_status(df, kri, amber, red):
-        """Return df with a status column for the selected KRI."""
-        col = f'{kri} status'
-        df[col] = df[kri].apply(
-            lambda x: 'Green' if x <= amber else
-                    ('Amber' if x <= red else 'Red')
+@st.cache_resource
+def get_result_cache():
+    """Process-wide cache of scenario pipelines, KRI frames and statuses.
+
+    Shared by every session: identical settings (the seed included) map
+    to the same keys, and concurrent identical requests are computed once.
+    ``KRI_CACHE_BUDGET_MB`` sets the total memory budget (default 1152).
+    """
+    budget_mb = float(os.environ.get('KRI_CACHE_BUDGET_MB', 1152))
+    return ResultCache.from_budget(
+        budget_mb * 2**20, max_entries={'raw': 8, 'kpis': 8, 'status': 32})
+
+
+@st.cache_resource
+def get_scenario_store():
+    """On-disk scenario store shared by all processes, if configured.
+
+    Set ``KRI_SCENARIO_STORE`` to a directory to enable it (and optionally
+    ``KRI_SCENARIO_STORE_FORMAT`` to ``parquet`` or ``ipc``).
+    """
+    root = os.environ.get('KRI_SCENARIO_STORE')
+    if not root:
+        return None
+    from kri_engine.store import ScenarioStore
+    return ScenarioStore(root, format=os.environ.get('KRI_SCENARIO_STORE_FORMAT', 'parquet'))
+
+
+def _plotly():
+    """Plotly Express and graph objects, imported when the first chart is drawn.
+
+    Keeps them off the cold-start path: nothing is plotted until a
+    simulation has been run.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+
+@st.cache_resource
+def reference_table():
+    """Static KRI data field reference table (Step 7), built once per process."""
+    return pd.DataFrame({
+        'Field Category': [
+            'Data Source', 
+            'Calculation Method', 
+            'Reporting Unit', 
+            'Update Frequency', 
+            'Threshold Levels',
+            'Status Logic',
+            'Escalation Process'
+        ],
+        'Description': [
+            "System or process generating the raw data (e.g., Trading System, HR Database)",
+            "Mathematical formula or business rule used to compute the KRI value",  
+            "Business unit, geography, or functional area being measured",
+            "How often the KRI is calculated and reported (daily, weekly, monthly)",
+            "Predetermined values that trigger amber and red alerts",
+            "Rules for assigning Green/Amber/Red status based on KRI values",
+            "Defined actions and responsibilities when thresholds are breached"
+        ],
+        'Example for Unreconciled %': [
+            "Trade Settlement System",
+            "(Unreconciled Trades ÷ Total Trades) × 100", 
+            "Back Office Operations - Location A",
+            "Daily at 9 AM",
+            "Amber: 5%, Red: 10%",
+            "Green ≤ 5%, Amber 5-10%, Red > 10%",
+            "Amber: Team Lead Review, Red: Manager Investigation"
+        ]
+    })
+
+
+def aggregation_cube(cache, key, df, statuses, kris, duration):
+    """KRI cube for the first ``duration`` days, cached under ``key``.
+
+    A cached cube for a shorter horizon is extended with the new days only.
+    """
+    cube = cache.status.get(key)
+    if cube is not None and 0 < cube.num_days <= duration:
+        if cube.num_days == duration:
+            return cube
+        new_days = df['Date'] > cube.dates[-1]
+        frame = pd.concat([df.loc[new_days, ['Date', 'Location', *kris]],
+                           statuses.loc[new_days]], axis=1)
+        cube = cube.append_frame(frame)
+    else:
+        cube = KRICube.from_frame(pd.concat(
+            [df[['Date', 'Location', *kris]], statuses], axis=1), kris)
+    cache.status.put(key, cube)
+    return cube
+
+
+# Longest horizon the sidebar offers; scenarios are stored at this length
+MAX_DURATION = 365
+
+# Calibration process pool; every session shares the host, so it is capped
+# (``KRI_CALIBRATION_WORKERS``, default 4) and never exceeds the CPU count
+CALIBRATION_WORKERS = max(1, min(os.cpu_count() or 1,
+                                 int(os.environ.get('KRI_CALIBRATION_WORKERS', 4))))
+
+# Trend chart rendering: every point as SVG up to SVG_POINT_LIMIT, then
+# WebGL with per-location min/max downsampling, and for many locations a
+# p5/median/p95 band. No mode ships more than MAX_CHART_POINTS points.
+SVG_POINT_LIMIT = 20_000
+MAX_CHART_POINTS = 50_000
+BAND_LOCATION_LIMIT = 25
+
+
+def build_trend_figure(df, kri, title):
+    """Return (figure, caption) for the KRI trend chart at any data size."""
+    px, go = _plotly()
+    total = len(df)
+    num_locations = df['Location'].nunique()
+    labels = {kri: "KRI Value", "Date": "Time Period"}
+    if total <= SVG_POINT_LIMIT:
+        fig = px.line(df, x="Date", y=kri, color="Location",
+                      title=title, labels=labels)
+        return fig, None
+
+    if num_locations <= BAND_LOCATION_LIMIT:
+        plot_df = downsample_frame(df, 'Date', kri, 'Location',
+                                   MAX_CHART_POINTS // num_locations)
+        fig = px.line(plot_df, x="Date", y=kri, color="Location",
+                      title=title, labels=labels, render_mode='webgl')
+        if len(plot_df) == total:
+            return fig, f"Rendered with WebGL ({total:,} points)."
+        return fig, (f"Showing {len(plot_df):,} of {total:,} points: each location is "
+                     "reduced to its per-bucket minimum and maximum, so breaches stay visible.")
+
+    band = quantile_band(df, 'Date', kri)
+    if len(band) > MAX_CHART_POINTS // 4:
+        band = band.iloc[minmax_indices(band['max'].to_numpy(),
+                                        MAX_CHART_POINTS // 4)]
+    fig = go.Figure([
+        go.Scattergl(x=band.index, y=band['p95'], name="95th percentile",
+                     line=dict(color="steelblue", width=0)),
+        go.Scattergl(x=band.index, y=band['p5'], name="5th–95th percentile",
+                     fill='tonexty', line=dict(color="steelblue", width=0)),
+        go.Scattergl(x=band.index, y=band['p50'], name="Median location",
+                     line=dict(color="steelblue")),
+        go.Scattergl(x=band.index, y=band['max'], name="Worst location",
+                     line=dict(color="firebrick", dash="dot")),
+    ])
+    fig.update_layout(title=title, xaxis_title="Time Period",
+                      yaxis_title="KRI Value")
+    return fig, (f"{num_locations} locations summarised as a percentile band across "
+                 "locations; the dotted line is the worst location on each day.")
+
+
+def render_performance_panel(profile):
+    """Sidebar panel with this rerun's stage timings, memory and cache markers.
+
+    Set ``KRI_PERF_LOG`` to a file to append every rerun's records there as
+    JSON lines.
+    """
+    log_path = os.environ.get('KRI_PERF_LOG')
+    if log_path:
+        profile.write_jsonl(log_path)
+    with st.sidebar.expander("Performance"):
+        rss = current_rss()
+        st.caption(f"Rerun {profile.run_id}: {profile.elapsed:.3f}s, RSS "
+                   + (f"{rss / 2**20:,.0f} MB" if rss is not None else "n/a"))
+        stages = profile.stages()
+        stages['name'] = ['\u2003' * depth + name
+                          for depth, name in zip(stages['depth'], stages['name'])]
+        st.dataframe(
+            stages.drop(columns='depth').rename(columns={
+                'name': 'Stage', 'seconds': 'Seconds', 'rss_mb': 'RSS MB',
+                'rss_delta_mb': 'Δ MB'}).round(4),
+            hide_index=True, use_container_width=True
+        )
+        lookups = profile.cache_summary()
+        if len(lookups):
+            st.caption("Cache lookups in this rerun")
+            st.dataframe(lookups, use_container_width=True)
+        st.download_button(
+            "Download log (JSON lines)", profile.to_jsonl(),
+            file_name=f"kri-perf-{profile.run_id}.jsonl", mime="application/jsonl"
+        )
+        st.button(
+            "Profile next rerun",
+            on_click=lambda: st.session_state.update(profile_next_run=True),
+            help="Capture a function-level profile of the rerun this click triggers"
         )
-        return df, col
+        captured = st.session_state.get('last_profile')
+        if captured is not None and captured.text:
+            st.caption(f"{captured.tool} profile of the last captured rerun")
+            st.code(captured.text, language=None)
 
 
+def run_page1():
+    cache = get_result_cache()
+    store = get_scenario_store()
+    profile = RunProfile()
+    capture = st.session_state.pop('profile_next_run', False)
+    with capture_profile() if capture else contextlib.nullcontext() as captured:
+        if captured is not None:
+            st.session_state['last_profile'] = captured
+        with profile.stage('page'):
+            completed = _render_page(cache, store, profile)
+    render_performance_panel(profile)
+    if not completed:
+        # Stop only after the panel is drawn; nothing renders after st.stop()
+        st.stop()
+
+
+def _render_page(cache, store, profile):
+    """Render the lab; returns False if it stopped early for missing input."""
     # -------------------------------------------------------------
     # Main page
     # -------------------------------------------------------------
@@ -120,7 +282,7 @@ def run_page1():
     st.sidebar.markdown("**Time Period and Scope**")
     duration = st.sidebar.slider(
         "Days of data to simulate", 
-        min_value=10, max_value=365, value=60,
+        min_value=10, max_value=MAX_DURATION, value=60,
         help="More days = longer time series for trend analysis"
     )
     num_locations = st.sidebar.slider(
@@ -174,6 +336,17 @@ def run_page1():
             help="Positive = increasing turnover over time"
         )
     }
+    seed = st.sidebar.number_input(
+        "Random seed", 
+        value=42, min_value=0, step=1,
+        help="The same seed and settings always reproduce the same dataset"
+    )
+    compact = st.sidebar.checkbox(
+        "Compact data types",
+        value=False,
+        help="Store locations and statuses as categories and use the smallest numeric types; "
+             "reduces memory several times over for large simulations"
+    )
 
     st.sidebar.markdown("---")
     st.sidebar.header("Step 2: KRI Selection and Thresholds")
@@ -184,7 +357,7 @@ def run_page1():
         'System outages', 
         'Unreconciled items as % of volume',
         'Volume per staff'
-    ]
+    ] + list(WINDOW_KRIS)
     
     selected_kri = st.sidebar.multiselect(
         "Select KRIs to analyze", 
@@ -194,20 +367,31 @@ def run_page1():
     )
 
     st.sidebar.markdown("**Alert Thresholds**")
-    st.sidebar.caption("These apply to your first selected KRI")
-    amber_thr = st.sidebar.number_input(
-        "Amber threshold (Warning level)", 
-        value=70.0, min_value=0.0,
-        help="Values above this trigger a warning status"
-    )
-    red_thr = st.sidebar.number_input(
-        "Red threshold (Critical level)", 
-        value=85.0, min_value=0.0,
-        help="Values above this trigger a critical alert"
-    )
-    
-    if red_thr <= amber_thr:
-        st.sidebar.error("Red threshold must be higher than Amber threshold!")
+    st.sidebar.caption("Set an Amber and Red level for each selected KRI")
+    kri_thresholds = {}
+    default_thresholds = {**DEFAULT_THRESHOLDS, **WINDOW_THRESHOLDS}
+    for kri in selected_kri:
+        default_amber, default_red = default_thresholds.get(kri, FALLBACK_THRESHOLDS)
+        with st.sidebar.expander(kri, expanded=kri == selected_kri[0]):
+            amber = st.number_input(
+                "Amber threshold (Warning level)", 
+                value=default_amber, min_value=0.0, key=f"amber_{kri}",
+                help="Values above this trigger a warning status"
+            )
+            red = st.number_input(
+                "Red threshold (Critical level)", 
+                value=default_red, min_value=0.0, key=f"red_{kri}",
+                help="Values above this trigger a critical alert"
+            )
+            if red <= amber:
+                st.error("Red threshold must be higher than Amber threshold!")
+        kri_thresholds[kri] = (amber, red)
+
+    with st.sidebar.expander("Cache statistics"):
+        st.caption("Hits, misses, evictions and waits on another session's identical "
+                   "request, per cache tier, across all sessions since the app started")
+        cache_stats = st.empty()
+        cache_stats.dataframe(cache.stats(), use_container_width=True)
 
     # 2. Generate data
     st.markdown("### Step 2: Generate Your Synthetic Dataset")
@@ -220,13 +404,61 @@ def run_page1():
     """)
     
     if st.button("Run simulation", type="primary"):
+        # Keep the analysis on screen while sidebar settings are tweaked
+        st.session_state['simulation_requested'] = True
+
+    def load_or_simulate(pipeline):
+        """KRI frame for ``duration`` days, from the scenario store if possible.
+
+        The store keeps one copy of each scenario at ``MAX_DURATION`` days and
+        a shorter horizon reads only its date range. Days the pipeline already
+        holds in memory are never read back.
+        """
+        if store is None or pipeline.duration >= duration:
+            return pipeline.frame(duration)
+        end = pd.Timestamp(simulation.START_DATE) + pd.Timedelta(days=duration - 1)
+        # Other app processes asking for the same scenario wait for this one
+        return store.get_or_write(
+            scenario, lambda: pipeline.frame(MAX_DURATION), params={
+                'duration': MAX_DURATION, 'num_locations': num_locations,
+                'base_values': base_vals, 'volatility': vol,
+                'trend_factors': trend_vals, 'seed': seed, 'compact': compact},
+            columns=[*simulation.RAW_COLUMNS, *DERIVED_KRIS], end=end)
+
+    if st.session_state.get('simulation_requested'):
         with st.spinner("Generating synthetic operational data..."):
-            df = generate_synthetic_data(duration, num_locations,
-                                        base_vals, vol, trend_vals)
+            # One pipeline per scenario regardless of duration: a longer
+            # horizon only simulates the extra days, and derived KRIs and
+            # statuses are cached separately so thresholds and KRI selection
+            # never trigger a re-simulation.
+            with profile.stage('cache keys'):
+                scenario = pipeline_key(num_locations, base_vals, vol,
+                                        trend_vals, seed, compact)
+            with profile.stage('simulate + derived KRIs', rows=duration * num_locations):
+                pipeline = profile.cached(
+                    'raw', cache.raw, scenario,
+                    lambda: ScenarioPipeline(num_locations, base_vals, vol,
+                                             trend_vals, seed=seed, compact=compact))
+                df = profile.cached(
+                    'kpis', cache.kpis, (scenario, duration),
+                    lambda: load_or_simulate(pipeline))
+                cache.raw.put(scenario, pipeline)
+            window_selected = [kri for kri in selected_kri if kri in WINDOW_KRIS]
+            if window_selected:
+                # Windowed KRIs extend from the pipeline's trailing state, so a
+                # longer horizon only computes the new days
+                with profile.stage('windowed KRIs'):
+                    df = df.join(profile.cached(
+                        'kpis', cache.kpis, (scenario, duration, tuple(window_selected)),
+                        lambda: pipeline.window_frame(window_selected, duration)))
         st.success(f"Successfully generated {len(df)} rows of operational data!")
+        frame_bytes = df.memory_usage(deep=True).sum()
+        profile.mark('frame size', bytes=int(frame_bytes), rows=len(df))
+        st.caption(f"In-memory size: {frame_bytes / 1024:,.1f} KB")
         
         st.markdown("#### Raw Operational Data Preview")
-        st.dataframe(df.head(20), use_container_width=True)
+        with profile.stage('render raw table'):
+            st.dataframe(df[simulation.RAW_COLUMNS].head(20), use_container_width=True)
         
         st.markdown("""
         **Understanding Your Data:**
@@ -243,7 +475,8 @@ def run_page1():
         """)
     else:
         st.warning("Click 'Run simulation' above to generate data and continue with the analysis")
-        st.stop()
+        return False
+    px, go = _plotly()
 
     # 3. Calculate KPIs
     st.markdown("### Step 3: Calculate Derived KRIs")
@@ -258,11 +491,14 @@ def run_page1():
         2. **Volume per staff** = Total trades ÷ Number of staff
            - *Interpretation*: Higher values may indicate efficiency or staff overload
         
+        **Windowed KRIs** smooth or count over a trailing period at each location:
+        7/30-day moving averages, an exponentially weighted average (EWMA), the number
+        of breach days in the last 30, and a z-score of today's value against the
+        previous 30 days.
+        
         These calculations help transform raw numbers into meaningful risk indicators.
         """)
     
-    df = calculate_kpis(df)
-    
     if selected_kri:
         display_columns = selected_kri + ['Date', 'Location']
         available_columns = [col for col in display_columns if col in df.columns]
@@ -279,16 +515,17 @@ def run_page1():
         """)
     else:
         st.error("Please select at least one KRI in the sidebar to continue.")
-        st.stop()
+        return False
 
     # 4. Trend chart
     st.markdown("### Step 4: KRI Trend Analysis Over Time")
     
     if not selected_kri:
         st.error("Please select at least one KRI in the sidebar.")
-        st.stop()
+        return False
         
     kri_focus = selected_kri[0]
+    amber_thr, red_thr = kri_thresholds[kri_focus]
     
     st.info(f"""
     **Analyzing: {kri_focus}**
@@ -297,13 +534,28 @@ def run_page1():
     - **Red Zone**: Values above {red_thr} (Critical - Take immediate action)
     """)
 
-    df, status_col = assign_kri_status(df, kri_focus, amber_thr, red_thr)
+    with profile.stage('status assignment', kris=len(selected_kri)):
+        statuses = pd.concat([
+            profile.cached(
+                'status', cache.status,
+                (scenario, duration, kri) + tuple(kri_thresholds[kri]),
+                lambda kri=kri: ScenarioPipeline.status(df, kri, *kri_thresholds[kri]))
+            for kri in selected_kri
+        ], axis=1)
+    status_col = status_column(kri_focus)
+    with profile.stage('breach index'):
+        breach_index = profile.cached(
+            'status', cache.status,
+            (scenario, duration, kri_focus, 'breaches') + tuple(kri_thresholds[kri_focus]),
+            lambda: BreachIndex.from_frame(
+                pd.concat([df[['Date', 'Location', kri_focus]], statuses[status_col]], axis=1),
+                status_col, kri_focus))
+    cache_stats.dataframe(cache.stats(), use_container_width=True)
 
-    fig_line = px.line(
-        df, x="Date", y=kri_focus, color="Location",
-        title=f"Trend Analysis: {kri_focus}",
-        labels={kri_focus: "KRI Value", "Date": "Time Period"}
-    )
+    with profile.stage('build trend figure'):
+        fig_line, chart_note = build_trend_figure(
+            df, kri_focus, title=f"Trend Analysis: {kri_focus}"
+        )
     fig_line.add_hline(
         y=amber_thr, line=dict(color="orange", dash="dash"),
         annotation_text=f"Amber Threshold ({amber_thr})"
@@ -313,7 +565,10 @@ def run_page1():
         annotation_text=f"Red Threshold ({red_thr})"
     )
     fig_line.update_layout(height=500)
-    st.plotly_chart(fig_line, use_container_width=True)
+    with profile.stage('render trend chart'):
+        st.plotly_chart(fig_line, use_container_width=True)
+    if chart_note:
+        st.caption(chart_note)
     
     st.markdown("""
     **How to Read This Chart:**
@@ -332,7 +587,7 @@ def run_page1():
     # 5. Aggregated status
     st.markdown("### Step 5: Overall Risk Status Summary")
     
-    status_counts = df[status_col].value_counts().reindex(['Green', 'Amber', 'Red']).fillna(0)
+    status_counts = breach_index.status_counts()
     status_df = pd.DataFrame({
         'Status': status_counts.index,
         'Count': status_counts.values,
@@ -370,6 +625,99 @@ def run_page1():
     fig_bar.update_traces(texttemplate='%{text}%', textposition='outside')
     fig_bar.update_layout(height=400, showlegend=False)
     st.plotly_chart(fig_bar, use_container_width=True)
+
+    st.markdown("#### Breach Episodes")
+    st.caption("An episode is a run of consecutive days in Amber or Red at one location")
+    longest_red = breach_index.longest_streak(RED)
+    episodes = breach_index.episodes()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(
+            "Longest Red Streak",
+            f"{longest_red['Days']} days" if longest_red else "None",
+            help=(f"{longest_red['Location']}, {longest_red['Start']:%Y-%m-%d} to "
+                  f"{longest_red['End']:%Y-%m-%d}" if longest_red else None)
+        )
+    with col2:
+        st.metric("Amber Episodes", int((episodes['Status'] == 'Amber').sum()))
+    with col3:
+        st.metric("Red Episodes", int((episodes['Status'] == 'Red').sum()))
+
+    if len(episodes):
+        st.dataframe(
+            episodes.sort_values(['Days', 'Peak'], ascending=False).head(10),
+            use_container_width=True, hide_index=True
+        )
+        first_date, last_date = df['Date'].min().date(), df['Date'].max().date()
+        check_date = st.date_input(
+            "Look up a date", value=last_date,
+            min_value=first_date, max_value=last_date,
+            help="See which locations were in breach on this date and when the next breach starts"
+        )
+        in_red = breach_index.locations_in_status(check_date, RED)
+        in_breach = breach_index.locations_in_status(check_date, AMBER)
+        next_breach = breach_index.first_breach_after(check_date, status=AMBER)
+        next_text = (f"{next_breach['Status']} at {next_breach['Location']} from "
+                     f"{next_breach['Start']:%Y-%m-%d} ({next_breach['Days']} days)"
+                     if next_breach else "none")
+        st.markdown(f"""
+        - **In Red on {check_date}**: {', '.join(map(str, in_red)) or 'none'}
+        - **In Amber or Red on {check_date}**: {', '.join(map(str, in_breach)) or 'none'}
+        - **First breach starting on or after {check_date}**: {next_text}
+        """)
+
+    st.markdown("#### Aggregated KRI View")
+    st.caption("Roll every selected KRI up by business unit and period. Views are read from a "
+               "pre-aggregated location x KRI x period cube rather than regrouping the rows.")
+    with profile.stage('aggregation cube'):
+        cube = aggregation_cube(
+            cache, (scenario, 'cube', tuple(selected_kri))
+            + tuple(kri_thresholds[kri] for kri in selected_kri),
+            df, statuses, selected_kri, duration)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        level = st.selectbox("Period", ['Month', 'Week', 'Day'], key='cube_level')
+    with col2:
+        rows = st.selectbox("Rows", ['KRI', 'Location'], key='cube_rows')
+    with col3:
+        measure = st.selectbox("Measure", MEASURES, index=MEASURES.index('Breach %'),
+                               key='cube_measure',
+                               help="Breach % is the share of location-days in Amber or Red")
+    if rows == 'KRI':
+        scope = st.selectbox("Business unit", [ALL_LOCATIONS, *cube.locations],
+                             key='cube_location')
+        table = cube.pivot(measure, level.lower(), rows='kri', location=scope)
+    else:
+        cube_kri = st.selectbox("KRI", selected_kri, key='cube_kri')
+        table = cube.pivot(measure, level.lower(), rows='location', kri=cube_kri)
+    table.columns = table.columns.strftime('%Y-%m' if level == 'Month' else '%Y-%m-%d')
+    if measure in ('Min', 'Mean', 'Max') and rows == 'KRI':
+        # KRIs are on different scales; a shared colour scale would mislead
+        st.dataframe(table, use_container_width=True)
+    else:
+        fig_cube = px.imshow(
+            table, aspect='auto', color_continuous_scale='OrRd',
+            labels=dict(x=level, y=rows, color=measure),
+            title=f"{measure} by {rows.lower()} and {level.lower()}"
+        )
+        fig_cube.update_layout(height=max(300, 60 * len(table) + 150))
+        st.plotly_chart(fig_cube, use_container_width=True)
+        with st.expander("Table"):
+            st.dataframe(table, use_container_width=True)
+
+    if len(selected_kri) > 1:
+        kri_summary = cube.status_totals()
+        st.dataframe(kri_summary, use_container_width=True)
+
+        fig_kri = px.bar(
+            kri_summary.reset_index(names='KRI').melt(
+                id_vars='KRI', var_name='Status', value_name='Count'),
+            x='KRI', y='Count', color='Status',
+            color_discrete_map={'Green': 'green', 'Amber': 'orange', 'Red': 'red'},
+            title="Status Distribution Across All Selected KRIs"
+        )
+        fig_kri.update_layout(height=400)
+        st.plotly_chart(fig_kri, use_container_width=True)
     
     st.markdown("""
     **Interpreting Your Risk Profile:**
@@ -390,16 +738,14 @@ def run_page1():
     red_percentage = (status_counts.get('Red', 0) / total_days * 100)
     amber_percentage = (status_counts.get('Amber', 0) / total_days * 100)
     
-    if red_percentage > 20:
-        risk_level = "HIGH RISK"
+    risk_level = assess_risk(red_percentage, amber_percentage)
+    if risk_level == "HIGH RISK":
         recommendation = "Immediate action required. Review processes and controls."
         color = "red"
-    elif amber_percentage > 30:
-        risk_level = "MODERATE RISK"  
+    elif risk_level == "MODERATE RISK":
         recommendation = "Monitor closely and consider process improvements."
         color = "orange"
     else:
-        risk_level = "LOW RISK"
         recommendation = "Continue current monitoring approach."
         color = "green"
     
@@ -421,6 +767,90 @@ def run_page1():
     5. **Expand Coverage**: Add more KRIs to get comprehensive risk view
     """)
 
+    # Threshold calibration
+    st.markdown("#### Threshold Calibration (Monte Carlo)")
+    with st.expander(f"How sensitive is the verdict for {kri_focus} to its thresholds?"):
+        st.markdown("""
+        Re-runs this scenario many times with different random seeds and evaluates a grid of
+        Amber/Red candidates against every run at once. The heatmap shows how often each pair
+        would produce a **HIGH RISK** verdict; the band shows the spread of the Red-day
+        percentage across runs (5th to 95th percentile).
+        """)
+        col1, col2 = st.columns(2)
+        with col1:
+            replications = st.select_slider(
+                "Replications", options=[100, 250, 500, 1000, 2500, 5000], value=500,
+                help="More replications give tighter estimates but take longer"
+            )
+        with col2:
+            cal_vols = st.multiselect(
+                "Volatilities to compare",
+                sorted({round(vol * f, 3) for f in (0.5, 1.0, 1.5, 2.0)} | {vol}),
+                default=[vol],
+                help="Every volatility uses the same random draws, so differences are not noise"
+            )
+        if st.button("Run calibration"):
+            st.session_state['calibration_requested'] = True
+
+        if st.session_state.get('calibration_requested') and cal_vols:
+            grid = threshold_grid(df[kri_focus].to_numpy(dtype=np.float64),
+                                  amber_thr, red_thr)
+            with st.spinner(f"Simulating {replications * len(cal_vols):,} scenarios..."), \
+                    profile.stage('calibration', replications=replications):
+                calibration = profile.cached(
+                    'status', cache.status,
+                    ('calibration', scenario, duration, kri_focus, replications,
+                     tuple(cal_vols), tuple(grid)),
+                    lambda: calibrate(kri_focus, grid, grid, duration, num_locations,
+                                      base_vals, cal_vols, trend_vals,
+                                      replications=replications, seed=seed,
+                                      workers=CALIBRATION_WORKERS))
+            surface_vol = cal_vols[0]
+            if len(cal_vols) > 1:
+                surface_vol = st.selectbox("Heatmap volatility", cal_vols)
+            summary = calibration.summary()
+            current = summary[np.isclose(summary['Volatility'], surface_vol)
+                              & (summary['Amber'] == amber_thr)
+                              & (summary['Red'] == red_thr)]
+            if len(current):
+                row = current.iloc[0]
+                col1, col2 = st.columns(2)
+                col1.metric("P(HIGH RISK) at current thresholds",
+                            f"{row['P(HIGH RISK)']:.0%}")
+                col2.metric("Red days, 5th-95th percentile",
+                            f"{row['Red % p5']:.1f}% - {row['Red % p95']:.1f}%")
+
+            fig_surface = px.imshow(
+                calibration.surface('P(HIGH RISK)', surface_vol),
+                origin='lower', aspect='auto', zmin=0, zmax=1,
+                color_continuous_scale=['green', 'orange', 'red'],
+                labels=dict(x="Red threshold", y="Amber threshold", color="P(HIGH RISK)"),
+                title=f"Share of runs with a HIGH RISK verdict (volatility {surface_vol})"
+            )
+            st.plotly_chart(fig_surface, use_container_width=True)
+
+            band = calibration.red_band()
+            fig_band = go.Figure()
+            for volatility, rows in band.groupby('Volatility', sort=False):
+                fig_band.add_trace(go.Scatter(
+                    x=np.concatenate([rows['Red'], rows['Red'][::-1]]),
+                    y=np.concatenate([rows['p95'], rows['p5'][::-1]]),
+                    fill='toself', opacity=0.2, line=dict(width=0),
+                    name=f"volatility {volatility}: 5-95%", showlegend=False))
+                fig_band.add_trace(go.Scatter(
+                    x=rows['Red'], y=rows['mean'], mode='lines',
+                    name=f"volatility {volatility}"))
+            fig_band.add_vline(x=red_thr, line=dict(color="red", dash="dash"),
+                               annotation_text="Current Red threshold")
+            fig_band.add_hline(y=20, line=dict(color="gray", dash="dot"),
+                               annotation_text="HIGH RISK above 20%")
+            fig_band.update_layout(
+                title="Red-day percentage by Red threshold",
+                xaxis_title="Red threshold", yaxis_title="Red days (%)", height=400)
+            st.plotly_chart(fig_band, use_container_width=True)
+            st.caption(f"{calibration.replications:,} replications of "
+                       f"{num_locations} locations x {duration} days per volatility")
+
     # 7. Technical Reference
     with st.expander("Technical Reference: KRI Data Field Definitions"):
         st.markdown("""
@@ -429,37 +859,7 @@ def run_page1():
         Understanding these elements is crucial for implementing KRIs in production systems.
         """)
         
-        ref_data = {
-            'Field Category': [
-                'Data Source', 
-                'Calculation Method', 
-                'Reporting Unit', 
-                'Update Frequency', 
-                'Threshold Levels',
-                'Status Logic',
-                'Escalation Process'
-            ],
-            'Description': [
-                "System or process generating the raw data (e.g., Trading System, HR Database)",
-                "Mathematical formula or business rule used to compute the KRI value",  
-                "Business unit, geography, or functional area being measured",
-                "How often the KRI is calculated and reported (daily, weekly, monthly)",
-                "Predetermined values that trigger amber and red alerts",
-                "Rules for assigning Green/Amber/Red status based on KRI values",
-                "Defined actions and responsibilities when thresholds are breached"
-            ],
-            'Example for Unreconciled %': [
-                "Trade Settlement System",
-                "(Unreconciled Trades ÷ Total Trades) × 100", 
-                "Back Office Operations - Location A",
-                "Daily at 9 AM",
-                "Amber: 5%, Red: 10%",
-                "Green ≤ 5%, Amber 5-10%, Red > 10%",
-                "Amber: Team Lead Review, Red: Manager Investigation"
-            ]
-        }
-        
-        st.dataframe(pd.DataFrame(ref_data), use_container_width=True)
+        st.dataframe(reference_table(), use_container_width=True)
         
         st.markdown("""
         **Implementation Best Practices:**
@@ -470,3 +870,4 @@ def run_page1():
         - **Regular Calibration**: Review and adjust thresholds based on experience
         - **Documentation**: Maintain clear definitions and calculation methods
         """)
+    return True
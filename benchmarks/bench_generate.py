@@ -0,0 +1,86 @@
+"""Compare the vectorised generator with the original row-by-row loop.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_generate
+    python -m benchmarks.bench_generate --loop-max-rows 10000000
+
+The loop takes minutes at 10M rows, so by default it is only timed up to
+``--loop-max-rows`` rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.simulation import generate_synthetic_data
+
+BASE_VALUES = {'trades': 1000, 'unreconciled': 30, 'staff': 8}
+TREND_FACTORS = {'trades': 0.01, 'unreconciled': -0.005, 'staff': 0.001}
+VOLATILITY = 0.1
+
+# (locations, days) -> 10k, 1M and 10M rows
+SIZES = [(10, 1000), (1000, 1000), (10000, 1000)]
+
+
+def generate_synthetic_data_loop(duration, num_locations,
+                                 base_values, volatility, trend_factors):
+    """The original per-row implementation, kept as the baseline."""
+    dates = pd.date_range(start='2023-01-01', periods=duration)
+    data = []
+    for loc in range(num_locations):
+        for date in dates:
+            days = (date - dates[0]).days
+            trades = base_values['trades'] * (
+                1 + np.random.normal(0, volatility)
+                + trend_factors['trades'] * days
+            )
+            unreconciled = base_values['unreconciled'] * (
+                1 + np.random.normal(0, volatility)
+                + trend_factors['unreconciled'] * days
+            )
+            staff = base_values['staff'] * (
+                1 + np.random.normal(0, volatility)
+                + trend_factors['staff'] * days
+            )
+
+            data.append({
+                'Date': date,
+                'Location': f'Location {loc+1}',
+                'Volume of Trades per day': max(0, int(trades)),
+                'Number of unreconciled trades > 5 days': max(0, int(unreconciled)),
+                'Staff turnover': max(0, int(staff)),
+                'System outages': np.random.randint(0, 2),
+                'Number of Back Office Staff': max(1, int(staff*5))
+            })
+    return pd.DataFrame(data)
+
+
+def _time(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--loop-max-rows', type=int, default=1_000_000,
+                        help='skip the loop baseline above this many rows')
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>12} {'vectorised s':>14} {'loop s':>10} {'speedup':>9}")
+    for num_locations, duration in SIZES:
+        rows = num_locations * duration
+        fast = _time(generate_synthetic_data, duration, num_locations,
+                     BASE_VALUES, VOLATILITY, TREND_FACTORS, seed=0)
+        if rows <= args.loop_max_rows:
+            slow = _time(generate_synthetic_data_loop, duration, num_locations,
+                         BASE_VALUES, VOLATILITY, TREND_FACTORS)
+            print(f"{rows:>12,} {fast:>14.3f} {slow:>10.2f} {slow / fast:>8.0f}x")
+        else:
+            print(f"{rows:>12,} {fast:>14.3f} {'skipped':>10} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Memory footprint of the standard vs compact KRI frame schema.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_memory --locations 1000 --days 1000
+"""
+import argparse
+
+from kri_engine.kpis import calculate_kpis
+from kri_engine.schema import memory_report
+from kri_engine.simulation import generate_synthetic_data
+from kri_engine.status import DEFAULT_THRESHOLDS, status_frame, threshold_table
+
+BASE_VALUES = {'trades': 1000, 'unreconciled': 30, 'staff': 8}
+TREND_FACTORS = {'trades': 0.01, 'unreconciled': -0.005, 'staff': 0.001}
+VOLATILITY = 0.1
+
+
+def build(locations, days, compact):
+    df = generate_synthetic_data(days, locations, BASE_VALUES, VOLATILITY,
+                                 TREND_FACTORS, seed=0, compact=compact)
+    df = calculate_kpis(df, compact=compact)
+    kris = list(DEFAULT_THRESHOLDS)
+    statuses = status_frame(df, kris, threshold_table(DEFAULT_THRESHOLDS))
+    if not compact:
+        # The original app stored statuses as object-dtype strings
+        statuses = statuses.astype(str).astype(object)
+    return df.join(statuses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--locations', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    report = memory_report(build(args.locations, args.days, compact=False),
+                           build(args.locations, args.days, compact=True))
+    print(report.to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+"""Golden-output checks for the simulation -> KPI -> status engines.
+
+Every engine is compared with a plain reference written the way the
+original app computed things (``max(0, int(x))`` clipping, division via
+``replace(0, np.nan)`` then ``fillna(0)``, ``<=`` threshold edges), and
+the outputs of a few fixed seeded scenarios are compared with the digests
+in ``golden.json``. Run from the repository root::
+
+    python -m benchmarks.golden
+    python -m benchmarks.golden --update   # after an intended output change
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.breaches import BreachIndex
+from kri_engine.cube import ALL_LOCATIONS, KRICube
+from kri_engine.calibration import breach_counts, kri_values, simulate_replications
+from kri_engine.kpis import DERIVED_KRIS, assign_kri_status, calculate_kpis
+from kri_engine.pipeline import ScenarioPipeline
+from kri_engine.simulation import (generate_synthetic_data, iter_date_chunks,
+                                   location_labels, metrics_from_noise)
+from kri_engine.status import (AMBER, DEFAULT_THRESHOLDS, RED, STATUS_LEVELS,
+                               classify, status_column, status_frame,
+                               threshold_table)
+from kri_engine.windows import WINDOW_KRIS, RollingKRIs, window_kris
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'golden.json')
+
+BASE_VALUES = {'trades': 1000, 'unreconciled': 30, 'staff': 8}
+TREND_FACTORS = {'trades': 0.01, 'unreconciled': -0.005, 'staff': 0.001}
+VOLATILITY = 0.1
+
+# name -> generate_synthetic_data arguments of the frozen scenarios
+GOLDEN_SCENARIOS = {
+    'default': dict(duration=60, num_locations=2, seed=42),
+    'long': dict(duration=730, num_locations=5, seed=0),
+    'volatile': dict(duration=120, num_locations=4, seed=7, volatility=0.6,
+                     trend_factors={'trades': -0.02, 'unreconciled': 0.01,
+                                    'staff': -0.01}),
+}
+
+
+# -------------------------------------------------------------
+# Reference semantics of the original app
+# -------------------------------------------------------------
+def reference_row(noise_trades, noise_unreconciled, noise_staff, outage, day,
+                  base_values, trend_factors):
+    """One row of metrics, computed exactly as the original loop did."""
+    trades = base_values['trades'] * (1 + noise_trades + trend_factors['trades'] * day)
+    unreconciled = base_values['unreconciled'] * (
+        1 + noise_unreconciled + trend_factors['unreconciled'] * day)
+    staff = base_values['staff'] * (1 + noise_staff + trend_factors['staff'] * day)
+    return {
+        'Volume of Trades per day': max(0, int(trades)),
+        'Number of unreconciled trades > 5 days': max(0, int(unreconciled)),
+        'Staff turnover': max(0, int(staff)),
+        'System outages': int(outage),
+        'Number of Back Office Staff': max(1, int(staff * 5)),
+    }
+
+
+def reference_kpis(df):
+    """The original ``calculate_kpis`` (on a copy)."""
+    df = df.copy()
+    df['Unreconciled items as % of volume'] = (
+        df['Number of unreconciled trades > 5 days']
+        / df['Volume of Trades per day'].replace(0, np.nan)
+    ).fillna(0) * 100
+    df['Volume per staff'] = (
+        df['Volume of Trades per day']
+        / df['Number of Back Office Staff'].replace(0, np.nan)
+    ).fillna(0)
+    return df
+
+
+def reference_status(values, amber, red):
+    """The original per-row status lambda."""
+    return [
+        'Green' if x <= amber else ('Amber' if x <= red else 'Red')
+        for x in values
+    ]
+
+
+# -------------------------------------------------------------
+# Checks
+# -------------------------------------------------------------
+def _noise_grid():
+    """Noise values that push every metric across its clipping bounds."""
+    noise = np.array([-3.0, -1.5, -1.0, -0.999, -0.8, -0.2, 0.0, 0.2, 1.0, 2.5])
+    days = np.array([0.0, 1.0, 50.0, 199.0, 400.0])
+    trades, unrec, staff, day = np.meshgrid(noise, noise[::-1], np.roll(noise, 3),
+                                            days, indexing='ij')
+    outages = (np.arange(trades.size) % 2).reshape(trades.shape).astype(bool)
+    return trades.ravel(), unrec.ravel(), staff.ravel(), outages.ravel(), day.ravel()
+
+
+def check_clipping():
+    """metrics_from_noise clips and truncates like ``max(lower, int(x))``."""
+    failures = []
+    trend = {'trades': -0.004, 'unreconciled': 0.003, 'staff': -0.005}
+    noise_t, noise_u, noise_s, outages, days = _noise_grid()
+    got = metrics_from_noise(noise_t, noise_u, noise_s, outages, days,
+                             BASE_VALUES, trend)
+    expected = [reference_row(*args, BASE_VALUES, trend)
+                for args in zip(noise_t, noise_u, noise_s, outages, days)]
+    for name, values in got.items():
+        ref = np.array([row[name] for row in expected])
+        if not np.array_equal(values, ref):
+            bad = np.flatnonzero(values != ref)
+            failures.append(f"clipping: {name} differs at {len(bad)} rows "
+                            f"(first: got {values[bad[0]]}, expected {ref[bad[0]]})")
+    return failures
+
+
+def _division_frame():
+    volume = [0, 0, 1000, 250, 1, 0, 37, 999999]
+    unrec = [0, 12, 0, 25, 3, np.nan, 37, 1]
+    staff = [0, 5, 0, 1, 40, 1, 3, 7]
+    return pd.DataFrame({
+        'Date': pd.date_range('2023-01-01', periods=len(volume)),
+        'Location': 'Location 1',
+        'Volume of Trades per day': volume,
+        'Number of unreconciled trades > 5 days': unrec,
+        'Staff turnover': 0,
+        'System outages': 0,
+        'Number of Back Office Staff': staff,
+    })
+
+
+def check_division():
+    """Zero denominators give 0 (not inf/NaN), as in the original KPIs."""
+    failures = []
+    ref = reference_kpis(_division_frame())
+    for compact in (False, True):
+        got = calculate_kpis(_division_frame(), compact=compact)
+        for kri in DERIVED_KRIS:
+            expected = ref[kri].to_numpy()
+            if compact:
+                expected = expected.astype(np.float32)
+            if not np.array_equal(got[kri].to_numpy(), expected):
+                failures.append(f"division: {kri} (compact={compact}) differs: "
+                                f"{got[kri].tolist()} != {expected.tolist()}")
+    return failures
+
+
+def check_threshold_edges():
+    """Values equal to a threshold stay in the lower band; NaN is Red."""
+    failures = []
+    amber, red = 35.0, 45.0
+    values = np.array([-1.0, 0.0, 34.999, 35.0, 35.001, 44.999, 45.0, 45.001,
+                       1e9, np.inf, np.nan])
+    expected = reference_status(values, amber, red)
+    kri = 'Number of unreconciled trades > 5 days'
+    df = pd.DataFrame({
+        'Date': pd.date_range('2023-01-01', periods=len(values)),
+        'Location': 'Location 1', kri: values,
+    })
+    results = {
+        'classify': [STATUS_LEVELS[c] for c in classify(values, amber, red)],
+        'assign_kri_status': assign_kri_status(df.copy(), kri, amber, red)[0][
+            status_column(kri)].astype(str).tolist(),
+        'status_frame': status_frame(df, [kri], threshold_table({kri: (amber, red)}))[
+            status_column(kri)].astype(str).tolist(),
+        'ScenarioPipeline.status': ScenarioPipeline.status(
+            df, kri, amber, red).astype(str).tolist(),
+    }
+    for engine, got in results.items():
+        if got != expected:
+            failures.append(f"thresholds: {engine} gives {got}, expected {expected}")
+
+    # Count-based engines must agree with the per-row statuses
+    counts = pd.Series(expected).value_counts().reindex(STATUS_LEVELS, fill_value=0)
+    above = breach_counts(values[None, :], np.array([amber, red]))[0]
+    from_calibration = [len(values) - above[0], above[0] - above[1], above[1]]
+    if from_calibration != counts.tolist():
+        failures.append(f"thresholds: calibration counts {from_calibration} "
+                        f"!= {counts.tolist()}")
+    statuses = df.assign(**{status_column(kri): pd.Categorical(
+        expected, categories=STATUS_LEVELS)})
+    from_index = BreachIndex.from_frame(statuses, status_column(kri), kri).status_counts()
+    if from_index.tolist() != counts.tolist():
+        failures.append(f"thresholds: breach index counts {from_index.tolist()} "
+                        f"!= {counts.tolist()}")
+    return failures
+
+
+def check_threshold_overrides():
+    """Per-location overrides apply; a location without limits is an error."""
+    failures = []
+    kri = 'Staff turnover'
+    df = pd.DataFrame({
+        'Date': pd.Timestamp('2023-01-01'),
+        'Location': ['Location 1', 'Location 2', 'Location 3'],
+        kri: [5.0, 5.0, 5.0],
+    })
+    table = pd.DataFrame([(kri, None, 9.0, 11.0), (kri, 'Location 2', 1.0, 4.0)],
+                         columns=['KRI', 'Location', 'Amber', 'Red'])
+    got = status_frame(df, [kri], table)[status_column(kri)].astype(str).tolist()
+    if got != ['Green', 'Red', 'Green']:
+        failures.append(f"overrides: got {got}, expected ['Green', 'Red', 'Green']")
+    try:
+        status_frame(df, [kri], table.iloc[1:])
+    except ValueError as exc:
+        if 'Location 1' not in str(exc) or 'Location 2' in str(exc):
+            failures.append(f"overrides: unhelpful error for missing limits: {exc}")
+    else:
+        failures.append("overrides: override-only table classified locations "
+                        "without limits instead of raising")
+    return failures
+
+
+def check_breach_queries():
+    """Breach index point queries match a scan of the episodes."""
+    failures = []
+    kri = 'Staff turnover'
+    df = calculate_kpis(generate_synthetic_data(
+        120, 4, BASE_VALUES, VOLATILITY, TREND_FACTORS, seed=3))
+    df[status_column(kri)] = ScenarioPipeline.status(df, kri, 9, 11)
+    index = BreachIndex.from_frame(df, status_column(kri), kri)
+    episodes = index.episodes()
+    codes = episodes['Status'].cat.codes
+    for date in pd.date_range(df['Date'].min() - pd.Timedelta(days=1),
+                              df['Date'].max() + pd.Timedelta(days=1)):
+        for level in (AMBER, RED):
+            active = episodes[(codes >= level) & (episodes['Start'] <= date)
+                              & (episodes['End'] >= date)]
+            got = index.locations_in_status(date, level)
+            if sorted(got) != sorted(active['Location']):
+                failures.append(f"breaches: locations in status {level} on "
+                                f"{date:%Y-%m-%d}: {got}")
+            later = episodes[(codes >= level) & (episodes['Start'] >= date)]
+            found = index.first_breach_after(date, status=level)
+            expected = later['Start'].min() if len(later) else None
+            if (found and found['Start']) != expected:
+                failures.append(f"breaches: first breach at level {level} on or "
+                                f"after {date:%Y-%m-%d}: {found}, expected start "
+                                f"{expected}")
+    return failures
+
+
+def _location_major(df):
+    codes = pd.Categorical(df['Location'],
+                           categories=location_labels(df['Location'].nunique())).codes
+    return df.iloc[np.lexsort((df['Date'].to_numpy(), codes))].reset_index(drop=True)
+
+
+def check_engines_agree():
+    """Chunked, incremental, compact and batched engines match the full run."""
+    failures = []
+    args = (150, 6, BASE_VALUES, VOLATILITY, TREND_FACTORS)
+    full = calculate_kpis(generate_synthetic_data(*args, seed=3))
+
+    variants = {
+        'workers=2': generate_synthetic_data(*args, seed=3, workers=2, chunk_size=4),
+        'iter_date_chunks': _location_major(pd.concat(
+            iter_date_chunks(*args, seed=3, chunk_days=40), ignore_index=True)),
+        'compact': generate_synthetic_data(*args, seed=3, compact=True),
+    }
+    pipeline = ScenarioPipeline(*args[1:], seed=3)
+    pipeline.frame(40)
+    variants['ScenarioPipeline'] = pipeline.frame(150)
+    for name, df in variants.items():
+        for col in full.columns:
+            if col not in df:
+                continue
+            left = full[col].astype(str) if col == 'Location' else full[col]
+            right = df[col].astype(str) if col == 'Location' else df[col]
+            if not np.array_equal(left.to_numpy(), right.to_numpy()):
+                failures.append(f"engines: {name} differs in {col}")
+
+    replicated = simulate_replications([3], *args[:2], BASE_VALUES, VOLATILITY,
+                                       TREND_FACTORS)
+    for kri in ['Staff turnover', *DERIVED_KRIS]:
+        got = kri_values(replicated, kri)[0]
+        if not np.array_equal(got, full[kri].to_numpy(dtype=np.float64)):
+            failures.append(f"engines: calibration replication differs in {kri}")
+
+    kris = list(WINDOW_KRIS)
+    whole = window_kris(full, kris)
+    engine = RollingKRIs(kris, 6)
+    sources = {s: full[s].to_numpy(dtype=np.float64).reshape(6, -1)
+               for s in engine.sources}
+    parts = [engine.update({s: v[:, a:b] for s, v in sources.items()})
+             for a, b in ((0, 1), (1, 31), (31, 150))]
+    for kri in kris:
+        chunked = np.concatenate([part[kri] for part in parts], axis=1).reshape(-1)
+        if not np.array_equal(chunked, whole[kri].to_numpy()):
+            failures.append(f"engines: incremental window differs in {kri}")
+    return failures
+
+
+def check_cube():
+    """Cube rollups match a groupby over the rows, however days are appended."""
+    failures = []
+    kris = list(DEFAULT_THRESHOLDS)
+    df = calculate_kpis(generate_synthetic_data(100, 4, BASE_VALUES, VOLATILITY,
+                                                TREND_FACTORS, seed=5))
+    statuses = status_frame(df, kris, threshold_table(DEFAULT_THRESHOLDS))
+    frame = pd.concat([df, statuses], axis=1)
+    cube = KRICube.from_frame(frame, kris)
+
+    long = frame.melt(id_vars=['Date', 'Location'], value_vars=kris,
+                      var_name='KRI', value_name='Value')
+    long['Status'] = np.concatenate([statuses[status_column(kri)].astype(str)
+                                     for kri in kris])
+    for level, freq in (('week', 'W-SUN'), ('month', 'M')):
+        long['Period'] = long['Date'].dt.to_period(freq).dt.start_time
+        for location in (None, ALL_LOCATIONS):
+            by = ['KRI', 'Period'] if location else ['Location', 'KRI', 'Period']
+            ref = long.groupby(by).agg(
+                Min=('Value', 'min'), Mean=('Value', 'mean'), Max=('Value', 'max'),
+                Red=('Status', lambda s: (s == 'Red').sum()),
+                Amber=('Status', lambda s: (s == 'Amber').sum()))
+            got = cube.summary(level, location=location).set_index(
+                ['KRI', 'Period'] if location else ['Location', 'KRI', 'Period'])
+            got.index.names = by
+            if len(got) != len(ref):
+                failures.append(f"cube: {level} periods differ")
+                continue
+            got = got.reindex(ref.index)
+            for measure, column in (('Min', 'Min'), ('Mean', 'Mean'), ('Max', 'Max'),
+                                    ('Red days', 'Red'), ('Amber days', 'Amber')):
+                if not np.allclose(got[measure], ref[column], rtol=1e-6):
+                    failures.append(f"cube: {level} {measure} "
+                                    f"({location or 'per location'}) differs")
+
+    dates = frame['Date']
+    appended = KRICube.empty(cube.locations, kris, dates.min())
+    for a, b in ((0, 1), (1, 12), (12, 45), (45, 100)):
+        days = (dates - dates.min()).dt.days
+        appended = appended.append_frame(frame[(days >= a) & (days < b)])
+    for level in ('day', 'week', 'month'):
+        a, b = appended.summary(level), cube.summary(level)
+        # Means of a period split across appends are summed in another order
+        same = all(np.allclose(a[col], b[col], rtol=1e-12, equal_nan=True)
+                   if a[col].dtype.kind == 'f' else a[col].equals(b[col])
+                   for col in a.columns)
+        if not same:
+            failures.append(f"cube: appending in chunks changes the {level} rollup")
+    return failures
+
+
+# -------------------------------------------------------------
+# Frozen digests
+# -------------------------------------------------------------
+def _digest(df):
+    sha = hashlib.sha1()
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            data = values.to_numpy().astype('datetime64[ns]').astype(np.int64).tobytes()
+        elif pd.api.types.is_float_dtype(values):
+            data = np.round(values.to_numpy(dtype=np.float64), 6).tobytes()
+        elif pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            data = values.to_numpy(dtype=np.int64).tobytes()
+        else:
+            data = '\n'.join(values.astype(str)).encode()
+        sha.update(col.encode() + b'\0' + data)
+    return sha.hexdigest()
+
+
+def golden_digests():
+    """Digests of the raw, KPI, status and windowed outputs per scenario."""
+    digests = {}
+    for name, params in GOLDEN_SCENARIOS.items():
+        params = {'base_values': BASE_VALUES, 'volatility': VOLATILITY,
+                  'trend_factors': TREND_FACTORS, **params}
+        raw = generate_synthetic_data(**params)
+        kpis = calculate_kpis(raw.copy())
+        statuses = status_frame(kpis, list(DEFAULT_THRESHOLDS),
+                                threshold_table(DEFAULT_THRESHOLDS))
+        digests[name] = {
+            'raw': _digest(raw),
+            'kpis': _digest(kpis[DERIVED_KRIS]),
+            'status': _digest(statuses),
+            'windows': _digest(window_kris(kpis, list(WINDOW_KRIS))),
+        }
+    return digests
+
+
+def check_digests(path=GOLDEN_PATH):
+    """Current outputs match the recorded digests."""
+    with open(path) as fh:
+        expected = json.load(fh)
+    got = golden_digests()
+    return [f"digest: {name}/{stage} changed"
+            for name, stages in expected.items()
+            for stage, digest in stages.items()
+            if got.get(name, {}).get(stage) != digest]
+
+
+CHECKS = [check_clipping, check_division, check_threshold_edges,
+          check_threshold_overrides, check_breach_queries,
+          check_engines_agree, check_cube, check_digests]
+
+
+def run_checks():
+    """Run every check; returns the list of failure messages."""
+    failures = []
+    for check in CHECKS:
+        failures += check()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--update', action='store_true',
+                        help=f'rewrite {os.path.basename(GOLDEN_PATH)} from the current outputs')
+    args = parser.parse_args(argv)
+
+    if args.update:
+        with open(GOLDEN_PATH, 'w') as fh:
+            json.dump(golden_digests(), fh, indent=2)
+            fh.write('\n')
+        print(f"Wrote {GOLDEN_PATH}")
+        return 0
+    failures = run_checks()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(CHECKS)} checks, {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Cold-start budget for the Streamlit app.
+
+Measures, each in a fresh interpreter, the import time of the page module
+(from ``python -X importtime``) and the time of the first full script run
+of ``app.py`` (Streamlit's ``AppTest``, no simulation requested), and
+checks them against a budget. It also checks that modules only needed
+later (Plotly Express, the scenario store) are not imported at startup.
+Run from the repository root::
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --import-budget 0.8 --top 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULE = 'application_pages.page1'
+
+# Seconds; about twice what a warm laptop measures, so only real regressions fail
+IMPORT_BUDGET = 2.0
+FIRST_RUN_BUDGET = 6.0
+# Must not be imported until they are used
+DEFERRED_MODULES = ['plotly.express', 'kri_engine.store', 'pyarrow.dataset']
+
+_FIRST_RUN = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'exceptions': [str(e.value) for e in at.exception],
+                  'modules': sorted(sys.modules)}))
+"""
+
+
+def _python(*args):
+    return subprocess.run([sys.executable, *args], capture_output=True,
+                          text=True, cwd=ROOT,
+                          env={**os.environ, 'PYTHONPATH': ROOT})
+
+
+def import_times(module=APP_MODULE):
+    """``{module: (self, cumulative) seconds}`` for one fresh import of ``module``."""
+    result = _python('-X', 'importtime', '-c', f'import {module}')
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+    return times
+
+
+def first_run(app='app.py'):
+    """Seconds and imported modules of the first script run of ``app``."""
+    result = _python('-c', _FIRST_RUN, os.path.join(ROOT, app))
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_checks(import_budget=IMPORT_BUDGET, first_run_budget=FIRST_RUN_BUDGET,
+               repeat=3, report=None):
+    """Run the startup checks; returns the list of failure messages.
+
+    Timings are the best of ``repeat`` fresh processes. ``report``, if
+    given, is called with (name, seconds, budget) for each timing.
+    """
+    failures = []
+    imports = [import_times() for _ in range(repeat)]
+    seconds = min(times[APP_MODULE][1] for times in imports)
+    if report:
+        report(f'import {APP_MODULE}', seconds, import_budget)
+    if seconds > import_budget:
+        failures.append(f"import {APP_MODULE}: {seconds:.2f}s > {import_budget:.2f}s")
+    for module in DEFERRED_MODULES:
+        if module in imports[0]:
+            failures.append(f"{module} is imported at startup")
+
+    runs = [first_run() for _ in range(repeat)]
+    seconds = min(run['seconds'] for run in runs)
+    if report:
+        report('first run of app.py', seconds, first_run_budget)
+    if seconds > first_run_budget:
+        failures.append(f"first run of app.py: {seconds:.2f}s > {first_run_budget:.2f}s")
+    for error in runs[0]['exceptions']:
+        failures.append(f"first run of app.py raised: {error}")
+    for module in DEFERRED_MODULES:
+        if module in runs[0]['modules']:
+            failures.append(f"{module} is imported by the first run")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET)
+    parser.add_argument('--first-run-budget', type=float, default=FIRST_RUN_BUDGET)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15,
+                        help='list the slowest top-level imports')
+    args = parser.parse_args(argv)
+
+    if args.top:
+        times = import_times()
+        print(f"Slowest imports under {APP_MODULE} (cumulative):")
+        top = sorted(((cumulative, name) for name, (_, cumulative) in times.items()
+                      if '.' not in name or name.startswith(('kri_engine.', 'application_pages.'))),
+                     reverse=True)
+        for cumulative, name in top[:args.top]:
+            print(f"  {cumulative * 1000:8.1f} ms  {name}")
+
+    def report(name, seconds, budget):
+        print(f"{name:<40} {seconds:6.2f}s (budget {budget:.2f}s)")
+
+    failures = run_checks(args.import_budget, args.first_run_budget,
+                          args.repeat, report)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"Startup checks: {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
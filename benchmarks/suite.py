@@ -0,0 +1,249 @@
+"""Benchmark the simulation -> KPI -> status pipeline and catch regressions.
+
+Each stage runs over a size matrix (days x locations x KRIs) in its own
+forked process, so peak RSS is per case. Results are appended to a JSON
+history and compared with earlier runs on the same machine; the run fails
+(exit code 1) if a stage is slower than its baseline by more than
+``--tolerance``, or if the golden-output or startup checks fail. Run from the
+repository root::
+
+    python -m benchmarks.suite                  # quick matrix
+    python -m benchmarks.suite --full           # 60..3650 days, 1..1000 locations
+    python -m benchmarks.suite --stage kpis --no-save
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import golden, startup
+from kri_engine.kpis import assign_kri_status, calculate_kpis
+from kri_engine.simulation import generate_synthetic_data
+from kri_engine.status import DEFAULT_THRESHOLDS
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'history.json')
+
+ALL_KRIS = list(DEFAULT_THRESHOLDS)
+MATRIX = {
+    'days': [60, 365, 3650],
+    'locations': [1, 10, 100, 1000],
+    'kris': [1, len(ALL_KRIS)],
+}
+QUICK_MATRIX = {
+    'days': [60, 365],
+    'locations': [1, 100],
+    'kris': [1, len(ALL_KRIS)],
+}
+# Stages that do not depend on the number of KRIs run once per size
+STAGES = {'generate': False, 'kpis': False, 'status': True, 'pipeline': True}
+
+
+# -------------------------------------------------------------
+# Stages
+# -------------------------------------------------------------
+def _simulate(days, locations):
+    return generate_synthetic_data(days, locations, golden.BASE_VALUES,
+                                   golden.VOLATILITY, golden.TREND_FACTORS,
+                                   seed=0)
+
+
+def _statuses(df, kris):
+    for kri in kris:
+        df, _ = assign_kri_status(df, kri, *DEFAULT_THRESHOLDS[kri])
+    return df
+
+
+def _prepare(stage, days, locations):
+    """Input of ``stage`` (built outside the timed region), or None."""
+    if stage == 'kpis':
+        return _simulate(days, locations)
+    if stage == 'status':
+        return calculate_kpis(_simulate(days, locations))
+    return None
+
+
+def _run_stage(stage, data, days, locations, kris):
+    if stage == 'generate':
+        _simulate(days, locations)
+    elif stage == 'kpis':
+        calculate_kpis(data.copy())
+    elif stage == 'status':
+        _statuses(data.copy(), kris)
+    else:
+        _statuses(calculate_kpis(_simulate(days, locations)), kris)
+
+
+def run_case(stage, days, locations, num_kris, repeat):
+    """Best-of-``repeat`` wall time and peak RSS of one stage at one size."""
+    kris = ALL_KRIS[:num_kris]
+    data = _prepare(stage, days, locations)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run_stage(stage, data, days, locations, kris)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    rows = days * locations
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'stage': stage, 'days': days, 'locations': locations,
+        'kris': num_kris if STAGES[stage] else None,
+        'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        * scale / 2**20,
+    }
+
+
+def cases(matrix, stages):
+    for stage in stages:
+        kri_axis = matrix['kris'] if STAGES[stage] else [len(ALL_KRIS)]
+        for days, locations, num_kris in itertools.product(
+                matrix['days'], matrix['locations'], kri_axis):
+            yield stage, days, locations, num_kris
+
+
+def _fresh_process(fn, *args):
+    """Run ``fn`` in a new child so its peak RSS is its own."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(fn, *args).result()
+
+
+# -------------------------------------------------------------
+# History and regression check
+# -------------------------------------------------------------
+def machine_id():
+    return (f"{platform.node()}-{platform.machine()}-{os.cpu_count()}cpu-"
+            f"py{platform.python_version()}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(result):
+    return (result['stage'], result['days'], result['locations'], result['kris'])
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def baselines(history, machine, window=5):
+    """Median seconds per case over the last ``window`` runs on ``machine``."""
+    seconds = {}
+    for run in history:
+        if run['machine'] != machine:
+            continue
+        for result in run['results']:
+            seconds.setdefault(case_key(result), []).append(result['seconds'])
+    return {key: float(np.median(values[-window:]))
+            for key, values in seconds.items()}
+
+
+def compare(results, baseline, tolerance, min_seconds=0.02):
+    """Frame of results with baseline, ratio and a regression flag.
+
+    Slowdowns of less than ``min_seconds`` are never flagged; for the
+    smallest cases timer noise is larger than any tolerance.
+    """
+    frame = pd.DataFrame(results)
+    frame['baseline'] = [baseline.get(case_key(r)) for r in results]
+    frame['ratio'] = frame['seconds'] / frame['baseline']
+    frame['regressed'] = ((frame['ratio'] > 1 + tolerance)
+                          & (frame['seconds'] - frame['baseline'] > min_seconds))
+    return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--full', action='store_true',
+                        help='run the full size matrix')
+    parser.add_argument('--stage', action='append', choices=list(STAGES),
+                        help='stage to run (repeatable; default: all)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown vs baseline (default: 0.25 = 25%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.02,
+                        help='ignore slowdowns smaller than this many seconds')
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--no-save', action='store_true',
+                        help='do not append this run to the history')
+    parser.add_argument('--skip-golden', action='store_true')
+    parser.add_argument('--skip-startup', action='store_true',
+                        help='skip the app import-time / first-run budget')
+    args = parser.parse_args(argv)
+
+    failed = False
+    if not args.skip_golden:
+        failures = golden.run_checks()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        print(f"Golden checks: {len(failures)} failures")
+        failed = bool(failures)
+    if not args.skip_startup:
+        failures = startup.run_checks()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        print(f"Startup checks: {len(failures)} failures")
+        failed = failed or bool(failures)
+
+    matrix = MATRIX if args.full else QUICK_MATRIX
+    results = []
+    for case in cases(matrix, args.stage or list(STAGES)):
+        results.append(_fresh_process(run_case, *case, args.repeat))
+        r = results[-1]
+        print(f"{r['stage']:>9} {r['days']:>5}d {r['locations']:>5}loc "
+              f"{r['kris'] or '-':>2}kri {r['seconds']:>9.4f}s "
+              f"{r['rows_per_sec']:>14,.0f} rows/s {r['peak_rss_mb']:>8.1f} MB")
+
+    history = load_history(args.history)
+    machine = machine_id()
+    report = compare(results, baselines(history, machine), args.tolerance,
+                     args.min_seconds)
+    regressed = report[report['regressed']]
+    if len(regressed):
+        print("\nRegressions:")
+        print(regressed[['stage', 'days', 'locations', 'kris', 'seconds',
+                         'baseline', 'ratio']].to_string(index=False))
+        failed = True
+    elif report['baseline'].isna().all():
+        print("\nNo baseline for this machine yet")
+    else:
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+    if not args.no_save:
+        history.append({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(), 'machine': machine,
+            'numpy': np.__version__, 'pandas': pd.__version__,
+            'results': results,
+        })
+        with open(args.history, 'w') as fh:
+            json.dump(history, fh, indent=1)
+        print(f"Appended run to {args.history}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Compute core for the KRI Framework Simulator.
+
+Modules in this package depend only on NumPy and pandas so they can be used
+outside a Streamlit session. Import the submodule you need, e.g.
+``from kri_engine.simulation import generate_synthetic_data``.
+"""
@@ -0,0 +1,146 @@
+"""Run a grid of KRI scenarios headlessly and write status summaries.
+
+Usage::
+
+    python -m kri_engine.batch grid.json --out results/ --workers 8
+
+``grid.json`` maps scenario parameters to a value or a list of values; the
+batch runs every combination. Missing parameters take the dashboard
+defaults. ``thresholds`` is a list of ``{kri: [amber, red]}`` sets, all
+evaluated against each simulated scenario::
+
+    {
+      "duration": [365, 730],
+      "num_locations": 200,
+      "volatility": [0.1, 0.2],
+      "seed": [1, 2, 3],
+      "thresholds": [{"Staff turnover": [9, 11]}, {"Staff turnover": [10, 12]}]
+    }
+
+KRIs are float64, as in the dashboard, so a scenario gets the same statuses
+in both. ``--compact`` switches to float32 KRIs for very large grids.
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.cache import scenario_key
+from kri_engine.kpis import calculate_kpis
+from kri_engine.simulation import generate_synthetic_data
+from kri_engine.status import (DEFAULT_THRESHOLDS, assess_risk, status_column,
+                               status_frame, status_summary, threshold_table)
+from kri_engine.windows import WINDOW_KRIS, window_kris
+
+# Same defaults as the dashboard sidebar
+DEFAULT_SCENARIO = {
+    'duration': 60,
+    'num_locations': 2,
+    'base_values': {'trades': 1000, 'unreconciled': 30, 'staff': 8},
+    'volatility': 0.1,
+    'trend_factors': {'trades': 0.01, 'unreconciled': -0.005, 'staff': 0.001},
+    'seed': 42,
+}
+
+
+def expand_grid(grid):
+    """Return (scenarios, threshold_sets) for a grid specification."""
+    grid = dict(grid)
+    threshold_sets = grid.pop('thresholds', None) or [DEFAULT_THRESHOLDS]
+    if isinstance(threshold_sets, dict):
+        threshold_sets = [threshold_sets]
+    unknown = set(grid) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {', '.join(sorted(unknown))}")
+    axes = {name: grid.get(name, default)
+            for name, default in DEFAULT_SCENARIO.items()}
+    axes = {name: values if isinstance(values, list) else [values]
+            for name, values in axes.items()}
+    scenarios = [dict(zip(axes, values))
+                 for values in itertools.product(*axes.values())]
+    return scenarios, [{kri: tuple(pair) for kri, pair in thresholds.items()}
+                       for thresholds in threshold_sets]
+
+
+def run_scenario(scenario, threshold_sets, compact=False):
+    """Simulate one scenario once and summarise it under every threshold set.
+
+    By default KRIs are float64, as in the dashboard, so statuses match it
+    exactly. ``compact`` saves memory with float32 KRIs, which can move
+    values that sit on a threshold into another band.
+    """
+    df = calculate_kpis(generate_synthetic_data(**scenario, compact=compact),
+                        compact=compact)
+    windowed = list(dict.fromkeys(kri for thresholds in threshold_sets
+                                  for kri in thresholds if kri in WINDOW_KRIS))
+    if windowed:
+        windows = window_kris(df, windowed)
+        df = df.join(windows.astype(np.float32) if compact else windows)
+    key = scenario_key(**scenario, compact=compact)
+    rows = []
+    for set_id, thresholds in enumerate(threshold_sets):
+        kris = list(thresholds)
+        counts = status_summary(status_frame(df, kris, threshold_table(thresholds)))
+        for kri in kris:
+            green, amber, red = counts.loc[status_column(kri)]
+            total = green + amber + red
+            red_pct = red / total * 100 if total else 0.0
+            amber_pct = amber / total * 100 if total else 0.0
+            rows.append({
+                'scenario': key, 'threshold_set': set_id, 'KRI': kri,
+                'Amber threshold': thresholds[kri][0],
+                'Red threshold': thresholds[kri][1],
+                'Green': green, 'Amber': amber, 'Red': red,
+                'Red %': round(red_pct, 2), 'Amber %': round(amber_pct, 2),
+                'Risk level': assess_risk(red_pct, amber_pct),
+            })
+    return key, rows
+
+
+def run_batch(grid, workers=1, compact=False):
+    """Run every scenario in ``grid``; returns (summary frame, scenarios)."""
+    scenarios, threshold_sets = expand_grid(grid)
+    if workers <= 1:
+        results = [run_scenario(scenario, threshold_sets, compact)
+                   for scenario in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_scenario, scenarios,
+                                    itertools.repeat(threshold_sets),
+                                    itertools.repeat(compact)))
+    rows = [row for _, scenario_rows in results for row in scenario_rows]
+    params = {key: scenario for (key, _), scenario in zip(results, scenarios)}
+    return pd.DataFrame(rows), params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a grid of KRI scenarios and write status summaries.')
+    parser.add_argument('grid', help='JSON file describing the scenario grid')
+    parser.add_argument('--out', default='batch_results',
+                        help='output directory (default: batch_results)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--compact', action='store_true',
+                        help='use float32 KRIs to save memory; statuses of values '
+                             'on a threshold may then differ from the dashboard')
+    args = parser.parse_args(argv)
+
+    with open(args.grid) as fh:
+        grid = json.load(fh)
+    start = time.perf_counter()
+    summary, params = run_batch(grid, workers=args.workers, compact=args.compact)
+    os.makedirs(args.out, exist_ok=True)
+    summary.to_csv(os.path.join(args.out, 'status_summary.csv'), index=False)
+    with open(os.path.join(args.out, 'scenarios.json'), 'w') as fh:
+        json.dump(params, fh, indent=2)
+    print(f"Ran {len(params)} scenarios in {time.perf_counter() - start:.2f}s; "
+          f"wrote {len(summary)} rows to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
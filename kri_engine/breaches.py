@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from kri_engine.status import AMBER, GREEN, RED, STATUS_LEVELS
+
+# -------------------------------------------------------------
+# Run-length breach index
+# -------------------------------------------------------------
+EPISODE_COLUMNS = ['Location', 'Status', 'Start', 'End', 'Days', 'Peak']
+
+
+def _day_numbers(dates):
+    return pd.DatetimeIndex(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+class BreachIndex:
+    """Amber and Red episodes of one KRI, per location, in sorted arrays.
+
+    An episode is a run of consecutive days with the same non-Green status
+    at one location. Episodes are stored sorted by (location, start) in
+    flat arrays, so point queries are binary searches over episodes rather
+    than scans over location-days, and status counts follow from the
+    episode lengths.
+    """
+
+    def __init__(self, locations, loc, status, start, end, peak, rows_per_location):
+        self.locations = pd.Index(locations)
+        self.loc = loc
+        self.status = status
+        self.start = start
+        self.end = end
+        self.peak = peak
+        self.rows_per_location = rows_per_location
+        # Episodes never overlap within a location, so (location, day) keys
+        # are sorted for both starts and ends.
+        self._stride = int(end.max() - start.min() + 2) if len(start) else 1
+        self._origin = int(start.min()) if len(start) else 0
+        self._start_keys = self._keys(loc, start)
+        # Episodes at each minimum level (Amber = any breach, Red = Red only)
+        # with their sorted start keys, for "next breach" searches.
+        self._by_level = {}
+        lengths = self.lengths
+        self._longest = {}
+        for level in (AMBER, RED):
+            members = np.flatnonzero(status >= level)
+            self._by_level[level] = (members, self._start_keys[members])
+            exact = np.flatnonzero(status == level)
+            if len(exact):
+                self._longest[level] = exact[np.argmax(lengths[exact])]
+
+    @classmethod
+    def from_frame(cls, df, status_col, value_col, location_col='Location',
+                   date_col='Date'):
+        """Build the index from a frame with one row per location-day."""
+        loc_codes, locations = pd.factorize(df[location_col], sort=False)
+        days = _day_numbers(df[date_col])
+        order = np.lexsort((days, loc_codes))
+        loc_codes, days = loc_codes[order], days[order]
+        status = np.asarray(df[status_col].cat.codes)[order].astype(np.int8)
+        values = df[value_col].to_numpy(dtype=np.float64)[order]
+
+        n = len(order)
+        if n == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(locations, empty, empty.astype(np.int8), empty, empty,
+                       np.empty(0), np.zeros(len(locations), dtype=np.int64))
+        boundary = np.ones(n, dtype=bool)
+        boundary[1:] = ((loc_codes[1:] != loc_codes[:-1])
+                        | (status[1:] != status[:-1])
+                        | (days[1:] != days[:-1] + 1))
+        run_start = np.flatnonzero(boundary)
+        run_end = np.append(run_start[1:], n) - 1
+        peak = np.fmax.reduceat(values, run_start)
+        keep = status[run_start] != GREEN
+        run_start, run_end, peak = run_start[keep], run_end[keep], peak[keep]
+        return cls(locations, loc_codes[run_start], status[run_start],
+                   days[run_start], days[run_end], peak,
+                   np.bincount(loc_codes, minlength=len(locations)))
+
+    def _keys(self, loc, day):
+        return np.asarray(loc, dtype=np.int64) * self._stride + (day - self._origin)
+
+    def _query_keys(self, loc, day):
+        # Clip to just outside the episode range so a query never lands in a
+        # neighbouring location's keys
+        return self._keys(loc, np.clip(day, self._origin - 1,
+                                       self._origin + self._stride - 1))
+
+    @property
+    def lengths(self):
+        return self.end - self.start + 1
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.loc, self.status, self.start,
+                                      self.end, self.peak))
+
+    def __len__(self):
+        return len(self.start)
+
+    def _episode(self, i):
+        return {
+            'Location': self.locations[self.loc[i]],
+            'Status': STATUS_LEVELS[self.status[i]],
+            'Start': pd.Timestamp(np.datetime64(int(self.start[i]), 'D')),
+            'End': pd.Timestamp(np.datetime64(int(self.end[i]), 'D')),
+            'Days': int(self.lengths[i]),
+            'Peak': float(self.peak[i]),
+        }
+
+    def episodes(self):
+        """All episodes as a DataFrame (``EPISODE_COLUMNS``)."""
+        return pd.DataFrame({
+            'Location': self.locations[self.loc],
+            'Status': pd.Categorical.from_codes(self.status, STATUS_LEVELS),
+            'Start': self.start.astype('datetime64[D]'),
+            'End': self.end.astype('datetime64[D]'),
+            'Days': self.lengths,
+            'Peak': self.peak,
+        }, columns=EPISODE_COLUMNS)
+
+    def status_counts(self):
+        """Green/Amber/Red location-day counts from the episode lengths."""
+        lengths = self.lengths
+        amber = int(lengths[self.status == AMBER].sum())
+        red = int(lengths[self.status == RED].sum())
+        green = int(self.rows_per_location.sum()) - amber - red
+        return pd.Series([green, amber, red], index=STATUS_LEVELS)
+
+    def location_counts(self):
+        """Green/Amber/Red counts per location (one row per location)."""
+        n = len(self.locations)
+        lengths = self.lengths
+        amber = np.bincount(self.loc, weights=lengths * (self.status == AMBER), minlength=n)
+        red = np.bincount(self.loc, weights=lengths * (self.status == RED), minlength=n)
+        counts = pd.DataFrame({'Amber': amber, 'Red': red},
+                              index=self.locations).astype(np.int64)
+        counts.insert(0, 'Green', self.rows_per_location - counts.sum(axis=1))
+        return counts
+
+    def longest_streak(self, status=RED):
+        """Longest episode at ``status`` (dict), or None. O(1)."""
+        if status not in self._longest:
+            return None
+        return self._episode(self._longest[status])
+
+    def locations_in_status(self, date, status=RED):
+        """Locations whose status on ``date`` is at least ``status``.
+
+        One binary search per location over the episode starts.
+        """
+        if not len(self):
+            return []
+        day = _day_numbers([date])[0]
+        queries = self._query_keys(np.arange(len(self.locations)), day)
+        idx = np.searchsorted(self._start_keys, queries, side='right') - 1
+        valid = idx >= 0
+        idx = np.where(valid, idx, 0)
+        hit = (valid & (self.loc[idx] == np.arange(len(self.locations)))
+               & (self.end[idx] >= day) & (self.status[idx] >= status))
+        return list(self.locations[hit])
+
+    def first_breach_after(self, date, location=None, status=AMBER):
+        """First episode at ``status`` or worse starting on or after ``date``.
+
+        Episodes already under way on ``date`` are not returned; use
+        ``locations_in_status`` for those. One binary search per location;
+        without ``location`` the earliest result across all locations is
+        returned. None if there is no such episode.
+        """
+        if not len(self):
+            return None
+        day = _day_numbers([date])[0]
+        if location is None:
+            codes = np.arange(len(self.locations))
+        else:
+            codes = self.locations.get_indexer([location])
+            if codes[0] < 0:
+                raise KeyError(location)
+        members, start_keys = self._by_level[status]
+        idx = np.searchsorted(start_keys, self._query_keys(codes, day), side='left')
+        found = idx < len(members)
+        episodes = members[idx[found]]
+        episodes = episodes[self.loc[episodes] == codes[found]]
+        if not len(episodes):
+            return None
+        return self._episode(episodes[np.argmin(self.start[episodes])])
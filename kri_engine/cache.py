@@ -0,0 +1,203 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# Bounded result cache for simulations, derived KRIs and statuses
+# -------------------------------------------------------------
+def canonical_key(**params):
+    """Return a stable hex digest for a set of JSON-serialisable parameters.
+
+    Dict keys are sorted and floats are normalised, so two dicts with the
+    same contents always give the same key.
+    """
+    payload = json.dumps(params, sort_keys=True, separators=(',', ':'),
+                         default=float)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def scenario_key(duration, num_locations, base_values, volatility,
+                 trend_factors, seed, compact=False):
+    """Canonical key for one simulation scenario."""
+    return canonical_key(duration=int(duration), **_scenario_params(
+        num_locations, base_values, volatility, trend_factors, seed, compact))
+
+
+def pipeline_key(num_locations, base_values, volatility, trend_factors, seed,
+                 compact=False):
+    """Canonical key for a scenario at any duration (see ScenarioPipeline)."""
+    return canonical_key(**_scenario_params(
+        num_locations, base_values, volatility, trend_factors, seed, compact))
+
+
+def _scenario_params(num_locations, base_values, volatility, trend_factors,
+                     seed, compact):
+    return dict(
+        num_locations=int(num_locations),
+        base_values={k: float(v) for k, v in base_values.items()},
+        volatility=float(volatility),
+        trend_factors={k: float(v) for k, v in trend_factors.items()},
+        seed=None if seed is None else int(seed),
+        compact=bool(compact),
+    )
+
+
+def thresholds_key(kris, thresholds):
+    """Canonical key for a KRI selection and its ``{kri: (amber, red)}``."""
+    return canonical_key(
+        kris=list(kris),
+        thresholds={k: [float(a), float(r)] for k, (a, r) in thresholds.items()
+                    if k in kris},
+    )
+
+
+def sizeof(value):
+    """Approximate size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(item) for item in value)
+    return int(getattr(value, 'nbytes', 0))
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by entries and bytes.
+
+    ``hits``, ``misses`` and ``evictions`` count lookups since creation;
+    ``waits`` counts lookups that waited for another caller's computation
+    of the same key (see :meth:`get_or_compute`).
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing it on a miss.
+
+        Misses are single-flight: while one caller computes a key, other
+        callers asking for the same key wait for it rather than computing
+        it again. If the computation fails, one of the waiters takes over.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    return self.get(key)
+                done = self._inflight.get(key)
+                if done is None:
+                    done = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.waits += 1
+            done.wait()
+        try:
+            value = compute()
+            self.put(key, value)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds max_bytes
+        while len(self._entries) > 1 and (
+                (self.max_entries is not None
+                 and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None
+                    and self.nbytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'waits': self.waits,
+        }
+
+
+class ResultCache:
+    """Separate LRU tiers for raw simulations, derived KRIs and statuses.
+
+    Tiers are keyed independently by the caller, e.g. ``raw`` and ``kpis``
+    by the scenario key and ``status`` by scenario plus thresholds, so a
+    threshold change only misses the ``status`` tier.
+    """
+
+    TIERS = ('raw', 'kpis', 'status')
+    # Split of a total memory budget between the tiers (see from_budget)
+    BUDGET_SHARES = {'raw': 0.45, 'kpis': 0.45, 'status': 0.1}
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        max_entries = max_entries or {}
+        max_bytes = max_bytes or {}
+        for tier in self.TIERS:
+            setattr(self, tier, LRUCache(max_entries.get(tier),
+                                         max_bytes.get(tier)))
+
+    @classmethod
+    def from_budget(cls, max_bytes, max_entries=None):
+        """Cache whose tiers together hold at most ``max_bytes``."""
+        return cls(max_entries=max_entries,
+                   max_bytes={tier: int(max_bytes * share)
+                              for tier, share in cls.BUDGET_SHARES.items()})
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, tier).nbytes for tier in self.TIERS)
+
+    def stats(self):
+        """Counters per tier as a DataFrame (one row per tier)."""
+        return pd.DataFrame({tier: getattr(self, tier).stats()
+                             for tier in self.TIERS}).T
+
+    def clear(self):
+        for tier in self.TIERS:
+            getattr(self, tier).clear()
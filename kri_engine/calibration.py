@@ -0,0 +1,241 @@
+"""Monte Carlo calibration of Amber/Red thresholds for one KRI.
+
+Replication ``r`` is exactly ``generate_synthetic_data(..., seed=seeds[r])``
+with ``seeds = replication_seeds(seed, replications)``; replications are
+simulated together as (replication x location x day) arrays and every
+candidate threshold is evaluated in a single pass over the values.
+
+Usage::
+
+    result = calibrate('Staff turnover', amber_grid=[8, 9, 10],
+                       red_grid=[10, 11, 12], duration=365, num_locations=20,
+                       base_values=..., volatility=[0.1, 0.2],
+                       trend_factors=..., replications=2000, workers=8)
+    result.summary()                     # long table, one row per pair
+    result.surface('P(HIGH RISK)', 0.1)  # amber x red grid
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.kpis import DERIVED_KRIS, derived_kri_arrays
+from kri_engine.simulation import (_draw_block, location_streams,
+                                   metrics_from_noise, scenario_entropy)
+from kri_engine.windows import WINDOW_KRIS, RollingKRIs
+
+# Location-days simulated per task; bounds the memory of one block
+BLOCK_CELLS = 2_000_000
+RISK_LEVELS = ['HIGH RISK', 'MODERATE RISK', 'LOW RISK']
+
+
+def replication_seeds(seed, replications):
+    """Integer seeds for each replication, derived from ``seed``."""
+    return [int(s) for s in np.random.SeedSequence(seed).generate_state(
+        replications, dtype=np.uint32)]
+
+
+def threshold_grid(values, amber, red, num=21):
+    """Candidate thresholds spanning the bulk of ``values`` and both current levels.
+
+    The spanning points are rounded to 2 decimals; ``amber`` and ``red``
+    are included exactly, so the current pair can be looked up with ``==``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    lo = min(amber, np.quantile(values, 0.5)) if len(values) else amber
+    hi = max(red, values.max()) if len(values) else red
+    return np.unique(np.concatenate(
+        [np.round(np.linspace(lo, hi, num), 2), [amber, red]]))
+
+
+def _replication_noise(seeds, num_locations, duration):
+    """Unit-volatility noise for every (seed, location), stacked by row."""
+    streams = [location_streams(scenario_entropy(seed), loc)
+               for seed in seeds for loc in range(num_locations)]
+    return _draw_block(streams, duration, 1.0)
+
+
+def _replication_metrics(noise, outages, shape, base_values, volatility,
+                         trend_factors):
+    # normal(0, v) is v * standard_normal bit for bit, so scaling unit
+    # noise reproduces generate_synthetic_data for any volatility
+    days = np.arange(shape[-1], dtype=np.float64)
+    metrics = metrics_from_noise(*(n * volatility for n in noise), outages,
+                                 days, base_values, trend_factors)
+    return {name: values.reshape(shape) for name, values in metrics.items()}
+
+
+def simulate_replications(seeds, duration, num_locations, base_values,
+                          volatility, trend_factors):
+    """Raw metrics for several seeds as (replications x locations x days)."""
+    noise, outages = _replication_noise(seeds, num_locations, duration)
+    return _replication_metrics(noise, outages,
+                                (len(seeds), num_locations, duration),
+                                base_values, volatility, trend_factors)
+
+
+def kri_values(metrics, kri):
+    """Values of ``kri`` from replicated metrics, as a (replications x N) array."""
+    replications, num_locations, duration = next(iter(metrics.values())).shape
+    source = WINDOW_KRIS[kri].source if kri in WINDOW_KRIS else kri
+    if source in DERIVED_KRIS:
+        values = derived_kri_arrays(metrics['Volume of Trades per day'],
+                                    metrics['Number of unreconciled trades > 5 days'],
+                                    metrics['Number of Back Office Staff'])[source]
+    else:
+        values = metrics[source].astype(np.float64)
+    if kri in WINDOW_KRIS:
+        engine = RollingKRIs([kri], replications * num_locations)
+        values = engine.update({source: values.reshape(
+            replications * num_locations, duration)})[kri]
+    return values.reshape(replications, -1)
+
+
+def breach_counts(values, thresholds):
+    """Count values strictly above each sorted threshold, per row.
+
+    One ``searchsorted`` of every value against the thresholds, a bincount
+    per row, and a reverse cumulative sum give all counts at once. NaN
+    sorts above every threshold, matching ``classify`` (NaN is Red).
+    """
+    rows, k = values.shape[0], len(thresholds)
+    bins = np.searchsorted(thresholds, values, side='left')
+    bins += (np.arange(rows) * (k + 1))[:, None]
+    hist = np.bincount(bins.reshape(-1), minlength=rows * (k + 1))
+    hist = hist.reshape(rows, k + 1)
+    # values in bin i are above thresholds[:i]
+    return np.cumsum(hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+
+def _calibrate_block(seeds, kri, thresholds, duration, num_locations,
+                     base_values, volatilities, trend_factors):
+    """Breach counts of one block of seeds, (volatilities x seeds x thresholds)."""
+    noise, outages = _replication_noise(seeds, num_locations, duration)
+    shape = (len(seeds), num_locations, duration)
+    return np.stack([
+        breach_counts(kri_values(_replication_metrics(
+            noise, outages, shape, base_values, volatility, trend_factors),
+            kri), thresholds)
+        for volatility in volatilities])
+
+
+# -------------------------------------------------------------
+# Results
+# -------------------------------------------------------------
+class CalibrationResult:
+    """Breach counts of every replication at every candidate threshold."""
+
+    def __init__(self, kri, amber_grid, red_grid, volatilities, thresholds,
+                 above, days):
+        self.kri = kri
+        self.amber_grid = np.asarray(amber_grid, dtype=np.float64)
+        self.red_grid = np.asarray(red_grid, dtype=np.float64)
+        self.volatilities = list(volatilities)
+        self.thresholds = thresholds
+        self.above = above            # (volatilities x replications x thresholds)
+        self.days = days              # location-days per replication
+
+    @property
+    def replications(self):
+        return self.above.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.above.nbytes
+
+    def percentages(self):
+        """(amber %, red %) arrays of shape (vol x replication x amber x red)."""
+        amber = self.above[..., np.searchsorted(self.thresholds, self.amber_grid)]
+        red = self.above[..., np.searchsorted(self.thresholds, self.red_grid)]
+        red_pct = red[:, :, None, :] / self.days * 100
+        amber_pct = (amber[:, :, :, None] - red[:, :, None, :]) / self.days * 100
+        return amber_pct, red_pct
+
+    def risk_levels(self):
+        """Index into ``RISK_LEVELS`` per (vol x replication x amber x red).
+
+        Same rule as ``status.assess_risk``.
+        """
+        amber_pct, red_pct = self.percentages()
+        return np.select([red_pct > 20, amber_pct > 30], [0, 1], 2)
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """One row per (volatility, amber, red) pair with Amber < Red.
+
+        Columns: mean and quantiles of Red % and Amber % across
+        replications, and the share of replications per risk verdict.
+        """
+        amber_pct, red_pct = self.percentages()
+        red_pct = np.broadcast_to(red_pct, amber_pct.shape)
+        levels = self.risk_levels()
+        columns = {}
+        for name, pct in (('Red %', red_pct), ('Amber %', amber_pct)):
+            columns[f'{name} mean'] = pct.mean(axis=1)
+            for q, values in zip(quantiles, np.quantile(pct, quantiles, axis=1)):
+                columns[f'{name} p{round(q * 100):g}'] = values
+        for i, level in enumerate(RISK_LEVELS):
+            columns[f'P({level})'] = (levels == i).mean(axis=1)
+        vol, amber, red = np.meshgrid(self.volatilities, self.amber_grid,
+                                      self.red_grid, indexing='ij')
+        valid = (amber < red).reshape(-1)
+        frame = pd.DataFrame({
+            'Volatility': vol.reshape(-1), 'Amber': amber.reshape(-1),
+            'Red': red.reshape(-1),
+            **{name: values.reshape(-1) for name, values in columns.items()},
+        })
+        return frame[valid].reset_index(drop=True)
+
+    def surface(self, value='P(HIGH RISK)', volatility=None):
+        """``summary()[value]`` as an amber x red grid for one volatility."""
+        if volatility is None:
+            volatility = self.volatilities[0]
+        summary = self.summary()
+        summary = summary[np.isclose(summary['Volatility'], volatility)]
+        return summary.pivot(index='Amber', columns='Red', values=value)
+
+    def red_band(self, quantiles=(0.05, 0.5, 0.95)):
+        """Red % quantiles across replications, per volatility and Red threshold."""
+        red = self.above[..., np.searchsorted(self.thresholds, self.red_grid)]
+        red_pct = red / self.days * 100
+        rows = []
+        for v, volatility in enumerate(self.volatilities):
+            band = pd.DataFrame(
+                np.quantile(red_pct[v], quantiles, axis=0).T,
+                columns=[f'p{round(q * 100):g}' for q in quantiles])
+            band.insert(0, 'Red', self.red_grid)
+            band.insert(0, 'Volatility', volatility)
+            band['mean'] = red_pct[v].mean(axis=0)
+            rows.append(band)
+        return pd.concat(rows, ignore_index=True)
+
+
+def calibrate(kri, amber_grid, red_grid, duration, num_locations, base_values,
+              volatility, trend_factors, replications=1000, seed=None,
+              workers=1):
+    """Simulate ``replications`` scenarios per volatility and count breaches.
+
+    ``volatility`` may be one value or a list; every volatility uses the
+    same replication seeds and the same draws (common random numbers), so
+    differences between them are not sampling noise. Replications are split into blocks of
+    about ``BLOCK_CELLS`` location-days and run across ``workers``
+    processes.
+    """
+    volatilities = (list(volatility) if np.ndim(volatility)
+                    else [volatility])
+    thresholds = np.unique(np.concatenate([
+        np.asarray(amber_grid, dtype=np.float64),
+        np.asarray(red_grid, dtype=np.float64)]))
+    seeds = replication_seeds(seed, replications)
+    per_block = max(1, BLOCK_CELLS // max(1, num_locations * duration))
+    blocks = [seeds[i:i + per_block] for i in range(0, len(seeds), per_block)]
+    args = [(block, kri, thresholds, duration, num_locations, base_values,
+             volatilities, trend_factors) for block in blocks]
+    if workers <= 1 or len(blocks) <= 1:
+        results = [_calibrate_block(*task) for task in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_calibrate_block, *zip(*args)))
+    above = np.concatenate(results, axis=1)
+    return CalibrationResult(kri, amber_grid, red_grid, volatilities,
+                             thresholds, above, num_locations * duration)
@@ -0,0 +1,311 @@
+import numpy as np
+import pandas as pd
+
+from kri_engine.status import AMBER, RED, STATUS_LEVELS, status_column
+
+# -------------------------------------------------------------
+# Pre-aggregated location x KRI x period cube
+# -------------------------------------------------------------
+LEVELS = ('day', 'week', 'month')
+MEASURES = ('Red days', 'Amber days', 'Green days', 'Breach %', 'Red %',
+            'Min', 'Mean', 'Max')
+ALL_LOCATIONS = 'All locations'
+
+
+def _period_ids(days, level):
+    """Period number of each day number (days since 1970-01-01)."""
+    if level == 'day':
+        return days
+    if level == 'week':
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def _period_starts(ids, level):
+    if level == 'day':
+        days = ids
+    elif level == 'week':
+        days = ids * 7 - 3
+    else:
+        days = ids.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    return pd.DatetimeIndex(days.astype('datetime64[D]'))
+
+
+class _Rollup:
+    """Status counts and value statistics per (location, KRI, period)."""
+
+    def __init__(self, ids, counts, total, valid, low, high):
+        self.ids = ids          # (P,) sorted period numbers
+        self.counts = counts    # (L x K x P x 3) Green/Amber/Red days
+        self.total = total      # (L x K x P) float64 sum of finite values
+        self.valid = valid      # (L x K x P) number of finite values
+        self.low = low          # (L x K x P) float32 min
+        self.high = high        # (L x K x P) float32 max
+
+    @classmethod
+    def empty(cls, num_locations, num_kris):
+        shape = (num_locations, num_kris, 0)
+        return cls(np.empty(0, dtype=np.int64),
+                   np.zeros(shape + (3,), dtype=np.int16),
+                   np.zeros(shape), np.zeros(shape, dtype=np.int16),
+                   np.zeros(shape, dtype=np.float32),
+                   np.zeros(shape, dtype=np.float32))
+
+    @classmethod
+    def from_days(cls, ids, values, status):
+        """Aggregate (L x K x n) day arrays whose period ``ids`` are sorted.
+
+        A period is at most 31 days, so per-cell counts are int16.
+        """
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        finite = np.isfinite(values)
+        amber, red = (np.add.reduceat(status == level, starts, axis=2, dtype=np.int16)
+                      for level in (AMBER, RED))
+        # Every location-day has a status, so Green is what is left of the period
+        length = np.diff(np.r_[starts, len(ids)]).astype(np.int16)
+        counts = np.stack([length - amber - red, amber, red], axis=-1)
+        return cls(ids[starts], counts,
+                   np.add.reduceat(np.where(finite, values, 0), starts, axis=2),
+                   np.add.reduceat(finite, starts, axis=2, dtype=np.int16),
+                   np.fmin.reduceat(values, starts, axis=2).astype(np.float32),
+                   np.fmax.reduceat(values, starts, axis=2).astype(np.float32))
+
+    def merge(self, new):
+        """This rollup followed by ``new``; a period split between them is combined."""
+        if len(self.ids) and len(new.ids) and new.ids[0] == self.ids[-1]:
+            head = _Rollup(self.ids[-1:], *(
+                combine(a[:, :, -1:], b[:, :, :1]) for combine, a, b in zip(
+                    (np.add, np.add, np.add, np.fmin, np.fmax),
+                    self._arrays(), new._arrays())))
+            parts = [self._slice(0, -1), head, new._slice(1, None)]
+        else:
+            parts = [self, new]
+        return _Rollup(np.concatenate([p.ids for p in parts]), *(
+            np.concatenate(arrays, axis=2)
+            for arrays in zip(*(p._arrays() for p in parts))))
+
+    def _arrays(self):
+        return self.counts, self.total, self.valid, self.low, self.high
+
+    def _slice(self, start, stop):
+        return _Rollup(self.ids[start:stop],
+                       *(a[:, :, start:stop] for a in self._arrays()))
+
+    def across_locations(self):
+        """Rollup over every location, as a single-location rollup."""
+        return _Rollup(self.ids, self.counts.sum(axis=0, keepdims=True, dtype=np.int64),
+                       self.total.sum(axis=0, keepdims=True),
+                       self.valid.sum(axis=0, keepdims=True, dtype=np.int64),
+                       np.fmin.reduce(self.low, axis=0, keepdims=True),
+                       np.fmax.reduce(self.high, axis=0, keepdims=True))
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + sum(a.nbytes for a in self._arrays())
+
+
+class KRICube:
+    """Status counts and KRI min/mean/max by location x KRI x period.
+
+    Built once per scenario and threshold set from (locations x KRIs x
+    days) arrays. Day-level values (float32) and status codes (int8) are
+    kept, and week and month rollups are stored alongside them, so a
+    drill-down or pivot reads a few array cells instead of grouping the
+    location-day rows. The all-locations rollup is a reduction over the
+    cube's cells. :meth:`append` adds days and only aggregates the new
+    ones, combining the trailing week or month with the days that
+    continue it. Cubes are never modified in place.
+    """
+
+    def __init__(self, locations, kris, start, values, status, rollups):
+        self.locations = pd.Index(locations)
+        self.kris = pd.Index(kris)
+        self.start = start      # day number of the first day
+        self.values = values    # (L x K x D) float32
+        self.status = status    # (L x K x D) int8 codes into STATUS_LEVELS
+        self._rollups = rollups
+
+    @classmethod
+    def empty(cls, locations, kris, start):
+        """Cube with no days yet; ``start`` is the date of the first day to come."""
+        shape = (len(locations), len(kris), 0)
+        start = int(np.datetime64(pd.Timestamp(start), 'D').astype(np.int64))
+        return cls(locations, kris, start, np.zeros(shape, dtype=np.float32),
+                   np.zeros(shape, dtype=np.int8),
+                   {level: _Rollup.empty(len(locations), len(kris))
+                    for level in LEVELS[1:]})
+
+    @classmethod
+    def from_frame(cls, df, kris, location_col='Location', date_col='Date'):
+        """Build a cube from a frame with one row per location-day.
+
+        ``df`` needs each KRI column and its status column
+        (``status_column(kri)``); every location must cover the same days.
+        """
+        locations, dates, values, status = _frame_arrays(df, kris, location_col,
+                                                         date_col)
+        start = dates[0] if len(dates) else pd.Timestamp(0)
+        return cls.empty(locations, kris, start).append(values, status)
+
+    @property
+    def num_days(self):
+        return self.values.shape[2]
+
+    @property
+    def dates(self):
+        return _period_starts(self.start + np.arange(self.num_days), 'day')
+
+    @property
+    def nbytes(self):
+        return (self.values.nbytes + self.status.nbytes
+                + sum(r.nbytes for r in self._rollups.values()))
+
+    def append(self, values, status):
+        """Cube with the next ``n`` days added.
+
+        ``values`` and ``status`` are (locations x KRIs x n) arrays of KRI
+        values and status codes for the days following the last one.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        status = np.asarray(status, dtype=np.int8)
+        days = self.start + self.num_days + np.arange(values.shape[2])
+        rollups = dict(self._rollups)
+        if values.shape[2]:
+            for level in LEVELS[1:]:
+                rollups[level] = rollups[level].merge(_Rollup.from_days(
+                    _period_ids(days, level), values, status))
+        return KRICube(self.locations, self.kris, self.start,
+                       np.concatenate([self.values, values.astype(np.float32)], axis=2),
+                       np.concatenate([self.status, status], axis=2), rollups)
+
+    def append_frame(self, df, location_col='Location', date_col='Date'):
+        """:meth:`append` the days of ``df``, laid out as for :meth:`from_frame`."""
+        locations, dates, values, status = _frame_arrays(df, self.kris, location_col,
+                                                         date_col)
+        if not len(dates):
+            return self
+        expected = _period_starts(np.array([self.start + self.num_days]), 'day')[0]
+        if dates[0] != expected:
+            raise ValueError(f"expected days starting {expected:%Y-%m-%d}, "
+                             f"got {dates[0]:%Y-%m-%d}")
+        order = pd.Index(locations).get_indexer(self.locations)
+        if (order < 0).any() or len(locations) != len(self.locations):
+            raise ValueError("locations differ from the cube's")
+        return self.append(values[order], status[order])
+
+    # ---------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------
+    def _day_rollup(self, values, status):
+        """Day-level arrays in rollup form (one period per day)."""
+        counts = status[..., None] == np.arange(len(STATUS_LEVELS), dtype=np.int8)
+        finite = np.isfinite(values)
+        return _Rollup(self.start + np.arange(self.num_days), counts.astype(np.int32),
+                       np.where(finite, values, 0).astype(np.float64),
+                       finite.astype(np.int32), values, values)
+
+    def _select(self, level, kri, location):
+        """Rollup restricted to one KRI and/or location (None keeps the axis).
+
+        ``location=ALL_LOCATIONS`` rolls every location up into one.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"level must be one of {LEVELS}")
+        k = slice(None) if kri is None else [self.kris.get_loc(kri)]
+        if location in (None, ALL_LOCATIONS):
+            loc, locations = slice(None), self.locations
+        else:
+            loc = [self.locations.get_loc(location)]
+            locations = self.locations[loc]
+        if level == 'day':
+            rollup = self._day_rollup(self.values[loc][:, k], self.status[loc][:, k])
+        else:
+            rollup = self._rollups[level]
+            rollup = _Rollup(rollup.ids, *(a[loc][:, k] for a in rollup._arrays()))
+        if location == ALL_LOCATIONS:
+            return rollup.across_locations(), pd.Index([ALL_LOCATIONS])
+        return rollup, locations
+
+    @staticmethod
+    def _measure(rollup, measure):
+        counts = rollup.counts
+        days = counts.sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if measure in ('Red days', 'Amber days', 'Green days'):
+                return counts[..., STATUS_LEVELS.index(measure.split()[0])]
+            if measure == 'Breach %':
+                return (counts[..., 1] + counts[..., 2]) / days * 100
+            if measure == 'Red %':
+                return counts[..., 2] / days * 100
+            if measure == 'Mean':
+                return np.where(rollup.valid > 0, rollup.total / rollup.valid, np.nan)
+            if measure == 'Min':
+                return rollup.low.astype(np.float64)
+            if measure == 'Max':
+                return rollup.high.astype(np.float64)
+        raise ValueError(f"measure must be one of {MEASURES}")
+
+    def pivot(self, measure, level='month', rows='kri', kri=None, location=None):
+        """One measure as a table of ``rows`` x periods.
+
+        With ``rows='kri'`` there is one row per KRI for ``location``
+        (``ALL_LOCATIONS`` or None for the rollup across locations); with
+        ``rows='location'`` one row per location for ``kri`` (default: the
+        first KRI).
+        """
+        if rows == 'kri':
+            rollup, _ = self._select(level, None, location or ALL_LOCATIONS)
+            index = self.kris
+            table = self._measure(rollup, measure)[0]
+        elif rows == 'location':
+            rollup, index = self._select(level, kri or self.kris[0], None)
+            table = self._measure(rollup, measure)[:, 0]
+        else:
+            raise ValueError("rows must be 'kri' or 'location'")
+        return pd.DataFrame(table, index=index,
+                            columns=_period_starts(rollup.ids, level))
+
+    def summary(self, level='month', kri=None, location=None):
+        """Long table: one row per location x KRI x period with every measure.
+
+        ``kri`` and ``location`` filter (``location=ALL_LOCATIONS`` rolls
+        every location up into one).
+        """
+        rollup, locations = self._select(level, kri, location)
+        kris = self.kris if kri is None else pd.Index([kri])
+        periods = _period_starts(rollup.ids, level)
+        loc, k, p = np.meshgrid(np.arange(len(locations)), np.arange(len(kris)),
+                                np.arange(len(periods)), indexing='ij')
+        frame = pd.DataFrame({
+            'Location': locations[loc.reshape(-1)],
+            'KRI': kris[k.reshape(-1)],
+            'Period': periods[p.reshape(-1)],
+        })
+        for measure in MEASURES:
+            frame[measure] = self._measure(rollup, measure).reshape(-1)
+        return frame
+
+    def status_totals(self, location=ALL_LOCATIONS):
+        """Green/Amber/Red day counts per KRI over the whole horizon."""
+        rollup, _ = self._select('month', None, location)
+        counts = rollup.counts.sum(axis=2)[0]
+        return pd.DataFrame(counts.astype(np.int64), index=self.kris,
+                            columns=STATUS_LEVELS)
+
+
+def _frame_arrays(df, kris, location_col, date_col):
+    """(locations, dates, values, status) with arrays shaped (L x K x days)."""
+    codes, locations = pd.factorize(df[location_col], sort=False)
+    order = np.lexsort((df[date_col].to_numpy(), codes))
+    counts = np.bincount(codes, minlength=len(locations))
+    if len(df) and counts.min() != counts.max():
+        raise ValueError("every location must cover the same days")
+    days = counts[0] if len(df) else 0
+    shape = (len(locations), days)
+    values = np.stack([df[kri].to_numpy(dtype=np.float64)[order].reshape(shape)
+                       for kri in kris], axis=1)
+    status = np.stack([np.asarray(df[status_column(kri)].cat.codes)[order].reshape(shape)
+                       for kri in kris], axis=1).astype(np.int8)
+    dates = pd.DatetimeIndex(df[date_col].to_numpy()[order[:days]])
+    return locations, dates, values, status
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# Downsampling and aggregation for large trend charts
+# -------------------------------------------------------------
+def _bucket_edges(n, num_buckets):
+    return np.linspace(0, n, num_buckets + 1).astype(np.int64)
+
+
+def _bucket_extreme(y, edges, reducer):
+    """Index of the first min/max (``reducer``) in each non-empty bucket."""
+    starts = edges[:-1][np.diff(edges) > 0]
+    lengths = np.diff(np.append(starts, len(y)))
+    extreme = reducer.reduceat(y, starts)
+    bucket = np.repeat(np.arange(len(starts)), lengths)
+    hits = np.flatnonzero(y == extreme[bucket])
+    _, first = np.unique(bucket[hits], return_index=True)
+    return hits[first], extreme
+
+
+def minmax_indices(y, num_points):
+    """Indices keeping the min and max of each bucket plus both end points.
+
+    Returns at most ``num_points`` sorted indices. Because every bucket keeps
+    its maximum, any value above a threshold stays above it in the reduced
+    series.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= num_points:
+        return np.arange(n)
+    num_buckets = max(1, (num_points - 2) // 2)
+    edges = _bucket_edges(n, num_buckets)
+    y_filled = np.where(np.isnan(y), np.nanmean(y) if n else 0.0, y)
+    max_idx, _ = _bucket_extreme(y_filled, edges, np.maximum)
+    min_idx, _ = _bucket_extreme(y_filled, edges, np.minimum)
+    return np.unique(np.concatenate([[0, n - 1], min_idx, max_idx]))
+
+
+def lttb_indices(x, y, num_points, threshold=None):
+    """Largest-Triangle-Three-Buckets selection of ``num_points`` indices.
+
+    LTTB keeps the visual shape of a line well but may drop isolated
+    spikes, so when ``threshold`` is given the maximum of any bucket that
+    exceeds it, but has no selected point above it, is added back.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= num_points or num_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, num_points - 1).astype(np.int64)
+    selected = np.empty(num_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(num_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:stop] - y[anchor])
+                      - (x[anchor] - x[start:stop]) * (avg_y - y[anchor]))
+        anchor = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = anchor
+    if threshold is not None:
+        # Restore spikes only in buckets where no selected point breaches
+        edges = _bucket_edges(n, num_points - 2)
+        bucket_max, values = _bucket_extreme(
+            np.nan_to_num(y, nan=-np.inf), edges, np.maximum)
+        covered = np.zeros(len(values), dtype=bool)
+        np.logical_or.at(covered, np.searchsorted(edges, selected, 'right') - 1,
+                         y[selected] > threshold)
+        selected = np.union1d(selected,
+                              bucket_max[(values > threshold) & ~covered])
+    return selected
+
+
+def downsample_frame(df, x, y, group, points_per_group, method='minmax',
+                     threshold=None):
+    """Reduce each ``group`` series of ``df`` to about ``points_per_group`` rows.
+
+    ``method`` is ``'minmax'`` (vectorised, keeps every bucket extreme) or
+    ``'lttb'``. Rows keep their original order within each group.
+    """
+    keep = []
+    all_values = df[y].to_numpy()
+    for rows in df.groupby(group, sort=False, observed=True).indices.values():
+        values = all_values[rows]
+        if method == 'lttb':
+            xs = pd.to_numeric(df[x].iloc[rows]).to_numpy()
+            local = lttb_indices(xs, values, points_per_group, threshold)
+        else:
+            local = minmax_indices(values, points_per_group)
+        keep.append(rows[local])
+    if not keep:
+        return df.iloc[:0]
+    return df.iloc[np.concatenate(keep)]
+
+
+def quantile_band(df, x, y, quantiles=(0.05, 0.5, 0.95)):
+    """Per-``x`` quantiles (and max) of ``y`` across all groups.
+
+    Returns a frame indexed by ``x`` with one column per quantile
+    (``p5``, ``p50``, ...) and ``max``, so breaches stay visible even when
+    individual series are not drawn.
+    """
+    grouped = df.groupby(x, sort=True)[y]
+    band = grouped.quantile(list(quantiles)).unstack()
+    band.columns = [f'p{round(q * 100):g}' for q in quantiles]
+    band['max'] = grouped.max()
+    return band
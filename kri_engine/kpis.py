@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from kri_engine.status import STATUS_LEVELS, classify, status_column
+
+# -------------------------------------------------------------
+# Derived KRIs and status assignment
+# -------------------------------------------------------------
+DERIVED_KRIS = ['Unreconciled items as % of volume', 'Volume per staff']
+
+
+def _ratio(numerator, denominator):
+    """``numerator / denominator`` as float64, 0 where it is undefined.
+
+    Same result as ``(num / den.replace(0, np.nan)).fillna(0)`` but divides
+    straight into one preallocated output instead of building temporaries,
+    and never writes to the inputs.
+    """
+    out = np.zeros(np.shape(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    if np.asarray(numerator).dtype.kind == 'f' or np.asarray(denominator).dtype.kind == 'f':
+        out[np.isnan(out)] = 0
+    return out
+
+
+def derived_kri_arrays(trades, unreconciled, staff):
+    """Derived KRIs from raw metric arrays of any (matching) shape."""
+    unreconciled_pct = _ratio(unreconciled, trades)
+    unreconciled_pct *= 100
+    return {
+        'Unreconciled items as % of volume': unreconciled_pct,
+        'Volume per staff': _ratio(trades, staff),
+    }
+
+
+def derived_kpis(df, compact=False):
+    """Derived KRI columns of ``df`` as a separate frame on the same index.
+
+    ``df`` is only read, so a cached frame can be passed as is and the
+    result joined to it (``df.join(derived_kpis(df))``).
+    """
+    arrays = derived_kri_arrays(
+        df['Volume of Trades per day'].to_numpy(),
+        df['Number of unreconciled trades > 5 days'].to_numpy(),
+        df['Number of Back Office Staff'].to_numpy())
+    if compact:
+        arrays = {name: values.astype(np.float32) for name, values in arrays.items()}
+    return pd.DataFrame(arrays, index=df.index, columns=DERIVED_KRIS, copy=False)
+
+
+def calculate_kpis(df, compact=False):
+    """Add derived KRI columns to ``df`` in place (as float32 when ``compact``).
+
+    For frames that must not change, use :func:`derived_kpis` instead.
+    """
+    if df.empty:
+        return df
+    derived = derived_kpis(df, compact=compact)
+    for name in DERIVED_KRIS:
+        df[name] = derived[name]
+    return df
+
+
+def assign_kri_status(df, kri, amber, red):
+    """Return df with a categorical status column for the selected KRI."""
+    col = status_column(kri)
+    codes = classify(df[kri].to_numpy(dtype=np.float64), amber, red)
+    df[col] = pd.Categorical.from_codes(codes, STATUS_LEVELS)
+    return df, col
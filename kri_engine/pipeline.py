@@ -0,0 +1,166 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.kpis import derived_kri_arrays
+from kri_engine.simulation import (START_DATE, _draw_block, frame_from_arrays,
+                                   location_labels, location_streams,
+                                   metrics_from_noise, scenario_entropy)
+from kri_engine.status import STATUS_LEVELS, classify
+from kri_engine.windows import RollingKRIs
+
+# -------------------------------------------------------------
+# Incremental simulate -> KPI -> status pipeline
+# -------------------------------------------------------------
+class ScenarioPipeline:
+    """Simulation state for one scenario, recomputed only where inputs change.
+
+    Everything except ``duration`` is fixed at construction. Raw metrics
+    and derived KRIs are kept as (locations x days) arrays together with
+    each location's random streams, so asking for a longer horizon draws
+    and derives only the extra days, and a shorter one is a slice. Either
+    way the rows equal ``generate_synthetic_data`` for the same ``seed``.
+    Status classification is a separate, cheap step (:meth:`status`) so a
+    threshold change never touches the simulation. The stored arrays are
+    read-only and frames are built on views of them rather than copies;
+    callers get a shallow copy of the last frame built, so writing to it
+    copies the touched columns (copy-on-write) and never reaches the
+    arrays. Windowed KRIs
+    (:meth:`window_frame`) are computed on request and extended the same
+    way, from the last few days of state rather than the full history.
+    """
+
+    def __init__(self, num_locations, base_values, volatility, trend_factors,
+                 seed=None, compact=False):
+        self.num_locations = num_locations
+        self.base_values = dict(base_values)
+        self.volatility = volatility
+        self.trend_factors = dict(trend_factors)
+        self.compact = compact
+        self.duration = 0
+        self._labels = location_labels(num_locations)
+        entropy = scenario_entropy(seed)
+        self._streams = [location_streams(entropy, loc)
+                         for loc in range(num_locations)]
+        self._metrics = None
+        self._derived = None
+        self._windows = {}
+        self._frames = {}
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        """Bytes held by the simulated arrays and the cached frames.
+
+        Frame columns that are views of the arrays are not counted twice;
+        everything else (dates, locations, sliced copies) is counted deep.
+        """
+        arrays = list((self._metrics or {}).values())
+        arrays += list((self._derived or {}).values())
+        arrays += [values for _, values in self._windows.values()]
+        total = sum(values.nbytes for values in arrays)
+        for _, df in self._frames.values():
+            usage = df.memory_usage(deep=True)
+            total += int(usage['Index'])
+            for column in df.columns:
+                values = df[column]
+                if not (isinstance(values.dtype, np.dtype) and any(
+                        np.may_share_memory(values.to_numpy(), array)
+                        for array in arrays)):
+                    total += int(usage[column])
+        return total
+
+    def extend(self, duration):
+        """Simulate up to ``duration`` days; returns the number of new days."""
+        with self._lock:
+            extra = duration - self.duration
+            if extra <= 0:
+                return 0
+            noise, outages = _draw_block(self._streams, extra, self.volatility)
+            days = np.arange(self.duration, duration, dtype=np.float64)
+            metrics = metrics_from_noise(*noise, outages, days,
+                                         self.base_values, self.trend_factors)
+            derived = self._derive(metrics)
+            if self._metrics is not None:
+                metrics = {name: np.concatenate([self._metrics[name], values], axis=1)
+                           for name, values in metrics.items()}
+                derived = {name: np.concatenate([self._derived[name], values], axis=1)
+                           for name, values in derived.items()}
+            # Frames are built on views of these arrays, so freeze them
+            for values in (*metrics.values(), *derived.values()):
+                values.flags.writeable = False
+            self._metrics, self._derived = metrics, derived
+            self.duration = duration
+            return extra
+
+    def _derive(self, metrics):
+        """Derived KRIs of newly simulated days, straight from the arrays."""
+        derived = derived_kri_arrays(metrics['Volume of Trades per day'],
+                                     metrics['Number of unreconciled trades > 5 days'],
+                                     metrics['Number of Back Office Staff'])
+        if self.compact:
+            derived = {name: values.astype(np.float32)
+                       for name, values in derived.items()}
+        return derived
+
+    def _shared_frame(self, kind, key, build):
+        """Shallow copy of the last ``kind`` frame, rebuilt when ``key`` changes.
+
+        Keeping the built frame alive is what makes pandas copy on write
+        into the returned copy instead of writing into the shared arrays.
+        """
+        with self._lock:
+            key = (key, self.duration)
+            cached_key, df = self._frames.get(kind, (None, None))
+            if cached_key != key:
+                df = build()
+                self._frames[kind] = (key, df)
+        return df.copy(deep=False)
+
+    def frame(self, duration):
+        """Raw metrics plus derived KRIs for the first ``duration`` days."""
+        self.extend(duration)
+
+        def build():
+            metrics = {name: values[:, :duration]
+                       for name, values in self._metrics.items()}
+            derived = {name: values[:, :duration]
+                       for name, values in self._derived.items()}
+            dates = pd.date_range(start=START_DATE, periods=duration)
+            return frame_from_arrays(dates, self._labels, metrics,
+                                     compact=self.compact, derived=derived)
+        return self._shared_frame('frame', duration, build)
+
+    def _window(self, kri, duration):
+        engine, values = self._windows.get(kri, (None, None))
+        if engine is None:
+            engine = RollingKRIs([kri], self.num_locations)
+            values = np.empty((self.num_locations, 0))
+        if engine.days < duration:
+            sources = {**self._metrics, **self._derived}
+            new = engine.update({source: sources[source][:, engine.days:duration]
+                                 for source in engine.sources})
+            values = np.concatenate([values, new[kri]], axis=1)
+            values.flags.writeable = False
+            self._windows[kri] = (engine, values)
+        return values
+
+    def window_frame(self, kris, duration):
+        """Windowed KRIs for the first ``duration`` days, in :meth:`frame` row order."""
+        self.extend(duration)
+        dtype = np.float32 if self.compact else np.float64
+
+        def build():
+            columns = {kri: self._window(kri, duration)[:, :duration]
+                       .reshape(-1).astype(dtype, copy=False)
+                       for kri in kris}
+            return pd.DataFrame(columns, columns=list(kris), copy=False)
+        return self._shared_frame('window', (tuple(kris), duration), build)
+
+    @staticmethod
+    def status(df, kri, amber, red):
+        """Categorical Green/Amber/Red status of one KRI column of ``df``."""
+        codes = classify(df[kri].to_numpy(dtype=np.float64), amber, red)
+        return pd.Series(pd.Categorical.from_codes(codes, STATUS_LEVELS),
+                         index=df.index, name=f'{kri} status')
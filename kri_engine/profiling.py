@@ -0,0 +1,162 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import uuid
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# -------------------------------------------------------------
+# Per-run stage timing, memory snapshots and cache markers
+# -------------------------------------------------------------
+def current_rss():
+    """Resident set size of this process in bytes.
+
+    Falls back to the peak RSS without ``/proc``, and to None where neither
+    is available (Windows).
+    """
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return None
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RunProfile:
+    """Structured timing records for one run (e.g. one Streamlit rerun).
+
+    ``stage()`` times a block and snapshots RSS around it, ``cached()``
+    wraps a cache lookup and records whether it hit, and ``mark()`` adds
+    any other event. Records are plain dicts, exportable as JSON lines.
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    def _record(self, event, **fields):
+        record = {'run': self.run_id, 'ts': round(time.time(), 3),
+                  'event': event, **fields}
+        self.records.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """Time the enclosed block as stage ``name``; nested stages are indented."""
+        rss_before = current_rss()
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            rss = current_rss()
+            known = rss is not None and rss_before is not None
+            self._record('stage', name=name, depth=self._depth,
+                         offset=start - self._start,
+                         seconds=time.perf_counter() - start,
+                         rss_mb=rss / 2**20 if rss is not None else None,
+                         rss_delta_mb=(rss - rss_before) / 2**20 if known else None,
+                         **fields)
+
+    def cached(self, tier, cache, key, compute):
+        """``cache.get_or_compute(key, compute)``, recording a hit or miss."""
+        hit = key in cache
+        start = time.perf_counter()
+        value = cache.get_or_compute(key, compute)
+        self._record('cache', tier=tier, hit=hit,
+                     seconds=time.perf_counter() - start)
+        return value
+
+    def mark(self, name, **fields):
+        return self._record('mark', name=name, **fields)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def stages(self):
+        """Stage records as a DataFrame in the order they started."""
+        stages = [r for r in self.records if r['event'] == 'stage']
+        columns = ['name', 'depth', 'seconds', 'rss_mb', 'rss_delta_mb']
+        if not stages:
+            return pd.DataFrame(columns=columns)
+        # Records are appended on exit; order by start offset instead
+        frame = pd.DataFrame(stages).sort_values('offset', kind='stable')
+        return frame[columns].reset_index(drop=True)
+
+    def cache_summary(self):
+        """Hits and misses per cache tier during this run."""
+        lookups = [r for r in self.records if r['event'] == 'cache']
+        if not lookups:
+            return pd.DataFrame(columns=['hits', 'misses'])
+        frame = pd.DataFrame(lookups)
+        return frame.groupby('tier').agg(hits=('hit', 'sum'),
+                                         misses=('hit', lambda h: (~h).sum()))
+
+    def to_jsonl(self):
+        return ''.join(json.dumps(record, default=str) + '\n'
+                       for record in self.records)
+
+    def write_jsonl(self, path):
+        """Append this run's records to ``path``."""
+        with open(path, 'a') as fh:
+            fh.write(self.to_jsonl())
+
+
+# -------------------------------------------------------------
+# Opt-in function-level profile of one run
+# -------------------------------------------------------------
+class CapturedProfile:
+    text = ''
+    tool = None
+
+
+@contextlib.contextmanager
+def capture_profile(limit=40):
+    """Profile the enclosed block; the report is in ``.text`` afterwards.
+
+    Uses pyinstrument when it is installed, otherwise cProfile sorted by
+    cumulative time (``limit`` functions).
+    """
+    result = CapturedProfile()
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result.tool = 'pyinstrument'
+            result.text = profiler.output_text(unicode=True, color=False)
+        return
+
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        result.tool = 'cProfile'
+        result.text = out.getvalue()
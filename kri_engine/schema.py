@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# Memory-optimised column types
+# -------------------------------------------------------------
+BOOLEAN_METRICS = ['System outages']
+
+
+def smallest_uint(values):
+    """Smallest unsigned dtype that holds every value in ``values``."""
+    if values.size == 0:
+        return np.dtype(np.uint8)
+    return np.promote_types(np.min_scalar_type(int(values.max())), np.uint8)
+
+
+def compact_metrics(metrics):
+    """Downcast non-negative integer metric arrays to the smallest uint.
+
+    Binary metrics (``System outages``) become uint8.
+    """
+    return {
+        name: values.astype(np.uint8 if name in BOOLEAN_METRICS
+                            else smallest_uint(values))
+        for name, values in metrics.items()
+    }
+
+
+def compact_frame(df):
+    """Return a copy of ``df`` using the memory-optimised schema.
+
+    Strings and status columns become categoricals, integer columns are
+    downcast to the smallest type that fits and float columns to float32.
+    float32 keeps about seven significant digits, so a value lying exactly
+    on a threshold can classify differently than in float64.
+    """
+    out = {}
+    for name, col in df.items():
+        if (pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)):
+            out[name] = col.astype('category')
+        elif pd.api.types.is_bool_dtype(col) or name in BOOLEAN_METRICS:
+            out[name] = col.astype(np.uint8)
+        elif pd.api.types.is_integer_dtype(col):
+            kind = 'unsigned' if len(col) and col.min() >= 0 else 'integer'
+            out[name] = pd.to_numeric(col, downcast=kind)
+        elif pd.api.types.is_float_dtype(col):
+            out[name] = col.astype(np.float32)
+        else:
+            out[name] = col
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report(before, after):
+    """Per-column ``memory_usage(deep=True)`` of two frames, in bytes.
+
+    Returns a DataFrame with ``before``, ``after`` and ``ratio`` columns and
+    a ``Total`` row (index excluded).
+    """
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True, index=False),
+        'after': after.memory_usage(deep=True, index=False),
+    }).fillna(0).astype(np.int64)
+    report.loc['Total'] = report.sum()
+    report['ratio'] = (report['before'] / report['after'].replace(0, np.nan)).round(2)
+    return report
@@ -0,0 +1,232 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kri_engine.schema import compact_metrics
+
+# -------------------------------------------------------------
+# Synthetic operational data
+# -------------------------------------------------------------
+START_DATE = '2023-01-01'
+
+RAW_COLUMNS = [
+    'Date',
+    'Location',
+    'Volume of Trades per day',
+    'Number of unreconciled trades > 5 days',
+    'Staff turnover',
+    'System outages',
+    'Number of Back Office Staff',
+]
+
+# One independent random stream per (location, metric)
+NOISE_METRICS = ['trades', 'unreconciled', 'staff', 'outages']
+
+
+def location_labels(num_locations, start=0):
+    """Return the display names for locations ``start .. start+num_locations``."""
+    return np.array([f'Location {loc+1}'
+                     for loc in range(start, start + num_locations)],
+                    dtype=object)
+
+
+def _floor_at(values, lower):
+    """Truncate towards zero (like ``int()``) and clip below at ``lower``."""
+    return np.maximum(np.trunc(values), lower).astype(np.int64)
+
+
+def metrics_from_noise(noise_trades, noise_unreconciled, noise_staff, outages,
+                       days, base_values, trend_factors):
+    """Turn standard-normal draws into the raw operational metrics.
+
+    ``noise_*`` are already scaled by volatility and broadcast against
+    ``days``; the return value maps each raw metric column to an int64 array
+    of the same shape.
+    """
+    trades = base_values['trades'] * (
+        1 + noise_trades + trend_factors['trades'] * days
+    )
+    unreconciled = base_values['unreconciled'] * (
+        1 + noise_unreconciled + trend_factors['unreconciled'] * days
+    )
+    staff = base_values['staff'] * (
+        1 + noise_staff + trend_factors['staff'] * days
+    )
+    return {
+        'Volume of Trades per day': _floor_at(trades, 0),
+        'Number of unreconciled trades > 5 days': _floor_at(unreconciled, 0),
+        'Staff turnover': _floor_at(staff, 0),
+        'System outages': np.asarray(outages, dtype=np.int64),
+        'Number of Back Office Staff': _floor_at(staff * 5, 1),
+    }
+
+
+def frame_from_arrays(dates, labels, metrics, compact=False, categories=None,
+                      derived=None):
+    """Build the raw DataFrame from (locations x days) metric arrays.
+
+    Rows are ordered location-major (every date for Location 1, then
+    Location 2, ...), which is the layout the rest of the app expects.
+    With ``compact`` the metrics are downcast and ``Location`` is a
+    categorical over ``categories`` (default: ``labels``), so chunks of the
+    same scenario share one set of categories. ``derived`` adds further
+    (locations x days) columns after the raw ones.
+
+    Columns are not copied: a full (locations x days) array becomes a view,
+    so callers that keep the arrays should make them read-only.
+    """
+    num_locations, duration = len(labels), len(dates)
+    loc_rows = np.repeat(np.arange(num_locations), duration)
+    if compact:
+        categories = labels if categories is None else categories
+        codes = pd.Index(categories).get_indexer(labels)[loc_rows]
+        location = pd.Categorical.from_codes(codes, categories)
+        metrics = compact_metrics(metrics)
+    else:
+        location = labels[loc_rows]
+    columns = {
+        'Date': np.tile(dates.values, num_locations),
+        'Location': location,
+    }
+    derived = derived or {}
+    for name, values in {**metrics, **derived}.items():
+        columns[name] = values.reshape(-1)
+    return pd.DataFrame(columns, columns=[*RAW_COLUMNS, *derived], copy=False)
+
+
+def scenario_entropy(seed):
+    """Return the root entropy for ``seed`` (fresh OS entropy when None)."""
+    return np.random.SeedSequence(seed).entropy
+
+
+def location_streams(entropy, loc):
+    """Return one Generator per noise metric for location index ``loc``.
+
+    The streams are ``SeedSequence(seed).spawn(num_locations)[loc].spawn(4)``,
+    built directly from their spawn keys so they do not depend on how the
+    location axis is split up or on how many days are drawn at a time.
+    """
+    return {
+        metric: np.random.default_rng(
+            np.random.SeedSequence(entropy, spawn_key=(loc, i)))
+        for i, metric in enumerate(NOISE_METRICS)
+    }
+
+
+def draw_days(streams, num_days, volatility):
+    """Draw the next ``num_days`` of noise from one location's streams."""
+    return (
+        streams['trades'].normal(0, volatility, num_days),
+        streams['unreconciled'].normal(0, volatility, num_days),
+        streams['staff'].normal(0, volatility, num_days),
+        streams['outages'].random(num_days) < 0.5,
+    )
+
+
+def _draw_block(streams, num_days, volatility):
+    """Stack ``draw_days`` for several locations into (locations x days)."""
+    noise = [np.empty((len(streams), num_days)) for _ in range(3)]
+    outages = np.empty((len(streams), num_days), dtype=bool)
+    for row, loc_streams in enumerate(streams):
+        trades, unreconciled, staff, outage = draw_days(
+            loc_streams, num_days, volatility)
+        noise[0][row], noise[1][row], noise[2][row] = trades, unreconciled, staff
+        outages[row] = outage
+    return noise, outages
+
+
+def _simulate_locations(entropy, loc_start, loc_stop, duration,
+                        base_values, volatility, trend_factors):
+    """Return (locations x days) metric arrays for one slice of locations."""
+    streams = [location_streams(entropy, loc)
+               for loc in range(loc_start, loc_stop)]
+    noise, outages = _draw_block(streams, duration, volatility)
+    days = np.arange(duration, dtype=np.float64)
+    return metrics_from_noise(*noise, outages, days, base_values, trend_factors)
+
+
+def _location_chunks(num_locations, chunk_size):
+    return [(start, min(start + chunk_size, num_locations))
+            for start in range(0, num_locations, chunk_size)]
+
+
+def iter_location_chunks(duration, num_locations, base_values, volatility,
+                         trend_factors, seed=None, workers=1, chunk_size=None,
+                         compact=False):
+    """Yield the simulation as DataFrames of ``chunk_size`` locations each.
+
+    With ``workers > 1`` the chunks are generated in a process pool and
+    yielded in location order. ``compact`` selects the memory-optimised
+    schema (see :func:`frame_from_arrays`).
+    """
+    entropy = scenario_entropy(seed)
+    if chunk_size is None:
+        chunk_size = max(1, -(-num_locations // max(1, workers)))
+    dates = pd.date_range(start=START_DATE, periods=duration)
+    chunks = _location_chunks(num_locations, chunk_size) or [(0, 0)]
+    args = (duration, base_values, volatility, trend_factors)
+    all_labels = location_labels(num_locations)
+
+    def to_frame(loc_start, loc_stop, metrics):
+        return frame_from_arrays(dates, all_labels[loc_start:loc_stop], metrics,
+                                 compact=compact, categories=all_labels)
+
+    if workers <= 1 or len(chunks) <= 1:
+        for loc_start, loc_stop in chunks:
+            yield to_frame(loc_start, loc_stop, _simulate_locations(
+                entropy, loc_start, loc_stop, *args))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_simulate_locations, entropy, loc_start,
+                               loc_stop, *args)
+                   for loc_start, loc_stop in chunks]
+        for (loc_start, loc_stop), future in zip(chunks, futures):
+            yield to_frame(loc_start, loc_stop, future.result())
+
+
+def generate_synthetic_data(duration, num_locations, base_values, volatility,
+                            trend_factors, seed=None, workers=1,
+                            chunk_size=None, compact=False):
+    """Return a DataFrame with synthetic operational metrics.
+
+    Each location draws from its own child of ``SeedSequence(seed)``, and
+    within a location every metric is drawn as one vector over all days.
+    The output therefore depends only on the parameters and ``seed``, never
+    on ``workers`` or ``chunk_size``. ``compact`` returns categorical
+    ``Location`` and downcast integer metrics.
+    """
+    chunks = list(iter_location_chunks(
+        duration, num_locations, base_values, volatility, trend_factors,
+        seed=seed, workers=workers, chunk_size=chunk_size, compact=compact))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def iter_date_chunks(duration, num_locations, base_values, volatility,
+                     trend_factors, seed=None, chunk_days=30, compact=False):
+    """Yield the simulation in date order, ``chunk_days`` days at a time.
+
+    Each chunk holds every location for its days (location-major within the
+    chunk). Only the per-location random streams are kept between chunks,
+    so memory stays proportional to ``chunk_days x num_locations`` however
+    long the horizon is. The chunks together hold the same rows as
+    ``generate_synthetic_data`` with the same ``seed``, but in a different
+    order: concatenated, they are ordered by chunk first, so sort by
+    location and date to line them up. ``compact`` works as it does there.
+    """
+    entropy = scenario_entropy(seed)
+    streams = [location_streams(entropy, loc) for loc in range(num_locations)]
+    labels = location_labels(num_locations)
+    dates = pd.date_range(start=START_DATE, periods=duration)
+
+    for day_start in range(0, duration, chunk_days):
+        day_stop = min(day_start + chunk_days, duration)
+        noise, outages = _draw_block(streams, day_stop - day_start, volatility)
+        days = np.arange(day_start, day_stop, dtype=np.float64)
+        metrics = metrics_from_noise(*noise, outages, days,
+                                     base_values, trend_factors)
+        yield frame_from_arrays(dates[day_start:day_stop], labels, metrics,
+                                compact=compact)
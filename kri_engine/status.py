@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# Vectorised multi-KRI status engine
+# -------------------------------------------------------------
+STATUS_LEVELS = ['Green', 'Amber', 'Red']
+GREEN, AMBER, RED = 0, 1, 2
+
+THRESHOLD_COLUMNS = ['KRI', 'Location', 'Amber', 'Red']
+
+# Starting thresholds for the KRIs the simulator produces (default settings)
+DEFAULT_THRESHOLDS = {
+    'Number of unreconciled trades > 5 days': (35.0, 45.0),
+    'Staff turnover': (9.0, 11.0),
+    'System outages': (0.0, 0.5),
+    'Unreconciled items as % of volume': (3.5, 5.0),
+    'Volume per staff': (30.0, 40.0),
+}
+FALLBACK_THRESHOLDS = (70.0, 85.0)
+
+
+def status_column(kri):
+    """Name of the status column for ``kri``."""
+    return f'{kri} status'
+
+
+def threshold_table(thresholds):
+    """Build a threshold table from ``{kri: (amber, red)}``.
+
+    The table has one row per KRI with ``Location`` left empty, meaning the
+    pair applies to every location. Rows with a ``Location`` override the
+    KRI-wide pair for that location only.
+    """
+    rows = [(kri, None, float(amber), float(red))
+            for kri, (amber, red) in thresholds.items()]
+    return pd.DataFrame(rows, columns=THRESHOLD_COLUMNS)
+
+
+def _threshold_arrays(table, kris, locations):
+    """Return (amber, red) arrays shaped (len(locations), len(kris))."""
+    if 'Location' not in table:
+        table = table.assign(Location=None)
+    amber = np.full((len(locations), len(kris)), np.nan)
+    red = np.full((len(locations), len(kris)), np.nan)
+    loc_index = pd.Index(locations)
+
+    default = table[table['Location'].isna()]
+    specific = table[table['Location'].notna()]
+    kri_pos = pd.Index(kris).get_indexer(default['KRI'])
+    keep = kri_pos >= 0
+    amber[:, kri_pos[keep]] = default['Amber'].to_numpy(float)[keep]
+    red[:, kri_pos[keep]] = default['Red'].to_numpy(float)[keep]
+
+    kri_pos = pd.Index(kris).get_indexer(specific['KRI'])
+    row_pos = loc_index.get_indexer(specific['Location'])
+    keep = (kri_pos >= 0) & (row_pos >= 0)
+    amber[row_pos[keep], kri_pos[keep]] = specific['Amber'].to_numpy(float)[keep]
+    red[row_pos[keep], kri_pos[keep]] = specific['Red'].to_numpy(float)[keep]
+
+    # Every (location, KRI) cell needs limits; a NaN limit would classify Red
+    rows, cols = np.nonzero(np.isnan(amber) | np.isnan(red))
+    if len(rows):
+        missing = [kris[k] if locations[r] is None else f"{kris[k]} at {locations[r]}"
+                   for r, k in zip(rows, cols)]
+        raise ValueError(f"No thresholds given for: {', '.join(missing)}")
+    return amber, red
+
+
+def classify(values, amber, red):
+    """Return int8 status codes for ``values`` against broadcastable limits.
+
+    Same rule as the original per-row lambda: Green if ``x <= amber``,
+    Amber if ``x <= red``, otherwise Red (including NaN).
+    """
+    return np.select([values <= amber, values <= red],
+                     [GREEN, AMBER], RED).astype(np.int8)
+
+
+def status_codes(df, kris, thresholds):
+    """Classify every KRI in ``kris`` in one pass.
+
+    ``thresholds`` is a threshold table (see :func:`threshold_table`).
+    Returns an int8 array of shape (len(df), len(kris)).
+    """
+    kris = list(kris)
+    values = df[kris].to_numpy(dtype=np.float64)
+    has_overrides = ('Location' in thresholds
+                     and thresholds['Location'].notna().any())
+    if has_overrides:
+        loc_codes, locations = pd.factorize(df['Location'])
+        amber, red = _threshold_arrays(thresholds, kris, locations)
+        amber, red = amber[loc_codes], red[loc_codes]
+    else:
+        amber, red = _threshold_arrays(thresholds, kris, [None])
+    return classify(values, amber, red)
+
+
+def status_frame(df, kris, thresholds):
+    """Return a DataFrame of categorical status columns, one per KRI.
+
+    The frame shares ``df``'s index; each column is stored as int8 codes
+    over Green/Amber/Red.
+    """
+    codes = status_codes(df, kris, thresholds)
+    return pd.DataFrame({
+        status_column(kri): pd.Categorical.from_codes(codes[:, i],
+                                                      STATUS_LEVELS)
+        for i, kri in enumerate(kris)
+    }, index=df.index)
+
+
+def status_summary(statuses):
+    """Green/Amber/Red counts per status column (one row per KRI)."""
+    return pd.DataFrame({
+        col: statuses[col].value_counts().reindex(STATUS_LEVELS, fill_value=0)
+        for col in statuses.columns
+    }).T.astype(np.int64)
+
+
+def assess_risk(red_percentage, amber_percentage):
+    """Overall verdict used in the dashboard summary.
+
+    More than 20% Red observations is HIGH RISK, otherwise more than 30%
+    Amber is MODERATE RISK, otherwise LOW RISK.
+    """
+    if red_percentage > 20:
+        return 'HIGH RISK'
+    if amber_percentage > 30:
+        return 'MODERATE RISK'
+    return 'LOW RISK'
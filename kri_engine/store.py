@@ -0,0 +1,185 @@
+import contextlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# -------------------------------------------------------------
+# On-disk scenario store (partitioned Parquet / Arrow IPC)
+# -------------------------------------------------------------
+PARTITION_COLUMNS = ['Location', 'Month']
+FORMATS = {'parquet': 'parquet', 'ipc': 'arrow'}
+
+
+def _month_column(dates):
+    """Categorical 'YYYY-MM' labels for a datetime column, built per month."""
+    codes, months = pd.factorize(dates.to_numpy().astype('datetime64[M]'))
+    return pd.Categorical.from_codes(codes, np.datetime_as_string(months))
+
+
+class ScenarioStore:
+    """Persist KRI frames under ``root/<key>/`` for reuse across processes.
+
+    Each scenario is a hive-partitioned dataset (``Location=.../Month=...``)
+    plus a ``scenario.json`` with the parameters and location order. Writes
+    go to a temporary directory that is renamed into place, so concurrent
+    readers never see half a scenario. Reads memory-map the files and only
+    touch the partitions and columns asked for; with ``format='ipc'`` the
+    columns are used zero-copy.
+    """
+
+    def __init__(self, root, format='parquet'):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {sorted(FORMATS)}")
+        self.root = os.fspath(root)
+        self.format = format
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self.path(key), 'scenario.json'))
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Hold an exclusive, cross-process lock on ``key``.
+
+        Lets one process compute and write a scenario while others block,
+        then find it in the store. A no-op where ``fcntl`` is unavailable.
+        """
+        if fcntl is None:
+            yield
+            return
+        locks = os.path.join(self.root, '.locks')
+        os.makedirs(locks, exist_ok=True)
+        with open(os.path.join(locks, f'{key}.lock'), 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def get_or_write(self, key, compute, params=None, **load_args):
+        """``load(key, **load_args)``, computing and writing ``key`` first if needed.
+
+        Concurrent processes asking for the same missing key compute it once.
+        """
+        if not self.exists(key):
+            with self.lock(key):
+                if not self.exists(key):
+                    self.write(key, compute(), params=params)
+        return self.load(key, **load_args)
+
+    def metadata(self, key):
+        with open(os.path.join(self.path(key), 'scenario.json')) as fh:
+            return json.load(fh)
+
+    def write(self, key, df, params=None):
+        """Write ``df`` (must have Date and Location columns) under ``key``."""
+        if self.exists(key):
+            return self.path(key)
+        tmp = os.path.join(self.root, f'.tmp-{key}-{uuid.uuid4().hex}')
+        location = df['Location']
+        locations = (location.cat.categories
+                     if isinstance(location.dtype, pd.CategoricalDtype)
+                     else pd.unique(location))
+        month = _month_column(df['Date'])
+        table = pa.Table.from_pandas(df.assign(Month=month),
+                                     preserve_index=False)
+        ds.write_dataset(
+            table, os.path.join(tmp, 'data'), format=self.format,
+            partitioning=PARTITION_COLUMNS, partitioning_flavor='hive',
+            basename_template='part-{i}.' + FORMATS[self.format],
+            existing_data_behavior='overwrite_or_ignore',
+            max_partitions=max(1024, len(locations) * len(month.categories)),
+        )
+        with open(os.path.join(tmp, 'scenario.json'), 'w') as fh:
+            json.dump({'params': params or {}, 'rows': len(df),
+                       'columns': list(df.columns),
+                       'locations': [str(loc) for loc in locations],
+                       'categorical_location': isinstance(location.dtype,
+                                                          pd.CategoricalDtype),
+                       'format': self.format}, fh, indent=2, default=str)
+        try:
+            os.rename(tmp, self.path(key))
+        except OSError:
+            # Another process stored the same scenario first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return self.path(key)
+
+    def dataset(self, key):
+        meta = self.metadata(key)
+        return ds.dataset(
+            os.path.join(self.path(key), 'data'), format=meta['format'],
+            partitioning='hive', filesystem=self._fs)
+
+    def _filter(self, start, end, locations):
+        expr = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if start is not None:
+            start = pd.Timestamp(start)
+            expr = both(expr, ds.field('Month') >= start.strftime('%Y-%m'))
+            expr = both(expr, ds.field('Date') >= pa.scalar(start, pa.timestamp('us')))
+        if end is not None:
+            end = pd.Timestamp(end)
+            expr = both(expr, ds.field('Month') <= end.strftime('%Y-%m'))
+            expr = both(expr, ds.field('Date') <= pa.scalar(end, pa.timestamp('us')))
+        if locations is not None:
+            expr = both(expr, ds.field('Location').isin(list(locations)))
+        return expr
+
+    def _scan_columns(self, key, columns):
+        if columns is None:
+            return self.metadata(key)['columns']
+        return list(dict.fromkeys(['Date', 'Location', *columns]))
+
+    def load(self, key, columns=None, start=None, end=None, locations=None):
+        """Read a stored scenario back in location-major, date order.
+
+        ``columns`` prunes columns (Date and Location are always read);
+        ``start``/``end`` (inclusive) and ``locations`` prune partitions.
+        """
+        table = self.dataset(key).to_table(
+            columns=self._scan_columns(key, columns),
+            filter=self._filter(start, end, locations))
+        return self._to_frame(key, table)
+
+    def iter_batches(self, key, columns=None, start=None, end=None,
+                     locations=None, batch_size=1_000_000):
+        """Yield a stored scenario as DataFrames without loading it whole."""
+        scanner = self.dataset(key).scanner(
+            columns=self._scan_columns(key, columns),
+            filter=self._filter(start, end, locations), batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield self._to_frame(key, pa.Table.from_batches([batch]),
+                                     sort=False)
+
+    def _to_frame(self, key, table, sort=True):
+        df = table.to_pandas()
+        meta = self.metadata(key)
+        location = pd.Categorical(df['Location'].astype(str),
+                                  categories=meta['locations'])
+        if sort:
+            order = np.lexsort((df['Date'].to_numpy(), location.codes))
+            df, location = df.iloc[order].reset_index(drop=True), location[order]
+        # Partitioning makes Location categorical; restore the written dtype
+        df['Location'] = (location if meta.get('categorical_location', True)
+                          else location.astype(str))
+        return df
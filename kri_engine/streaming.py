@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from kri_engine.kpis import assign_kri_status, calculate_kpis
+from kri_engine.simulation import iter_date_chunks
+from kri_engine.status import STATUS_LEVELS
+
+# -------------------------------------------------------------
+# Chunked scoring with running aggregates
+# -------------------------------------------------------------
+class RunningStatusSummary:
+    """Status counts accumulated one chunk at a time.
+
+    ``status_counts`` is a Green/Amber/Red Series over all rows seen so far,
+    and ``location_counts`` has one row per location with the same columns,
+    so per-location breach counts are ``location_counts[['Amber', 'Red']]``.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.status_counts = pd.Series(0, index=STATUS_LEVELS, dtype=np.int64)
+        self.location_counts = pd.DataFrame(columns=STATUS_LEVELS,
+                                            dtype=np.int64)
+
+    def update(self, df, status_col):
+        """Fold the statuses of one scored chunk into the totals."""
+        counts = pd.crosstab(df['Location'], df[status_col]).reindex(
+            columns=STATUS_LEVELS, fill_value=0)
+        self.location_counts = self.location_counts.add(
+            counts, fill_value=0).astype(np.int64)
+        self.status_counts += counts.sum().astype(np.int64)
+        self.rows += len(df)
+        self.chunks += 1
+
+    @property
+    def location_breaches(self):
+        """Amber and Red counts per location."""
+        return self.location_counts[['Amber', 'Red']]
+
+
+def score_chunks(chunks, kri, amber, red, summary=None):
+    """Run ``calculate_kpis`` and status assignment on each chunk.
+
+    Yields ``(chunk, status_col)`` pairs and updates ``summary`` (a
+    :class:`RunningStatusSummary`) as each chunk is scored.
+    """
+    for chunk in chunks:
+        chunk, status_col = assign_kri_status(calculate_kpis(chunk),
+                                              kri, amber, red)
+        if summary is not None:
+            summary.update(chunk, status_col)
+        yield chunk, status_col
+
+
+def stream_scenario(duration, num_locations, base_values, volatility,
+                    trend_factors, kri, amber, red, seed=None, chunk_days=30,
+                    summary=None):
+    """Simulate and score a scenario in date-ordered chunks.
+
+    Peak memory is bounded by ``chunk_days x num_locations`` rows as long as
+    the caller drops each chunk after use; pass a ``RunningStatusSummary``
+    to keep the aggregates.
+    """
+    chunks = iter_date_chunks(duration, num_locations, base_values,
+                              volatility, trend_factors, seed=seed,
+                              chunk_days=chunk_days)
+    return score_chunks(chunks, kri, amber, red, summary=summary)
@@ -0,0 +1,164 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# -------------------------------------------------------------
+# Rolling-window and trend KRIs
+# -------------------------------------------------------------
+# ``kind`` is one of:
+#   mean   - trailing average over ``window`` days (shorter at the start)
+#   count  - days in the trailing ``window`` with the source above ``level``
+#   ewma   - exponentially weighted average with span ``window``
+#   zscore - today's value against the previous ``window`` days (0 until a
+#            full baseline exists or when the baseline is flat)
+WindowSpec = namedtuple('WindowSpec', ['source', 'kind', 'window', 'level'],
+                        defaults=[0.0])
+
+WINDOW_KRIS = {
+    '7-day average unreconciled trades': WindowSpec(
+        'Number of unreconciled trades > 5 days', 'mean', 7),
+    '30-day average unreconciled %': WindowSpec(
+        'Unreconciled items as % of volume', 'mean', 30),
+    'Unreconciled trades EWMA (span 10)': WindowSpec(
+        'Number of unreconciled trades > 5 days', 'ewma', 10),
+    'Days with unreconciled trades above 35 (30-day)': WindowSpec(
+        'Number of unreconciled trades > 5 days', 'count', 30, 35),
+    'System outage days (30-day)': WindowSpec('System outages', 'count', 30),
+    'Volume per staff z-score (30-day baseline)': WindowSpec(
+        'Volume per staff', 'zscore', 30),
+}
+
+WINDOW_THRESHOLDS = {
+    '7-day average unreconciled trades': (35.0, 45.0),
+    '30-day average unreconciled %': (3.5, 5.0),
+    'Unreconciled trades EWMA (span 10)': (35.0, 45.0),
+    'Days with unreconciled trades above 35 (30-day)': (5.0, 10.0),
+    'System outage days (30-day)': (18.0, 21.0),
+    'Volume per staff z-score (30-day baseline)': (2.0, 3.0),
+}
+
+
+def window_sources(kris):
+    """Source columns the windowed ``kris`` are computed from."""
+    return list(dict.fromkeys(WINDOW_KRIS[kri].source for kri in kris))
+
+
+class RollingKRIs:
+    """Windowed KRIs over (locations x days) arrays, updated as days arrive.
+
+    Only the last ``window`` days of each source and the EWMA levels are
+    kept between calls, so appending ``n`` days costs O(n * window)
+    regardless of how many days came before. Every window sees the same
+    values in the same order whichever way the days are split into
+    updates, so results do not depend on the chunking.
+    """
+
+    def __init__(self, kris, num_locations):
+        self.kris = list(kris)
+        self.num_locations = num_locations
+        self.sources = window_sources(self.kris)
+        self.days = 0
+        self._depth = {}
+        for kri in self.kris:
+            spec = WINDOW_KRIS[kri]
+            self._depth[spec.source] = max(self._depth.get(spec.source, 1),
+                                           spec.window)
+        # Zero padding stands in for the days before the first update
+        self._tails = {source: np.zeros((num_locations, depth))
+                       for source, depth in self._depth.items()}
+        self._levels = {}
+
+    def update(self, sources):
+        """Append new days; ``sources`` maps source column -> (L x n) array.
+
+        Returns ``{kri: (L x n) float64 array}`` for the new days only.
+        """
+        extended = {}
+        n = None
+        for source, tail in self._tails.items():
+            values = np.asarray(sources[source], dtype=np.float64)
+            values = values.reshape(self.num_locations, -1)
+            n = values.shape[1]
+            extended[source] = np.concatenate([tail, values], axis=1)
+        if not n:
+            return {kri: np.empty((self.num_locations, 0)) for kri in self.kris}
+
+        day = self.days + np.arange(n)
+        out = {}
+        for kri in self.kris:
+            spec = WINDOW_KRIS[kri]
+            ext = extended[spec.source]
+            depth = self._depth[spec.source]
+            kernel = getattr(self, f'_{spec.kind}')
+            out[kri] = kernel(ext, depth, spec, day, kri)
+
+        for source, ext in extended.items():
+            self._tails[source] = ext[:, -self._depth[source]:].copy()
+        self.days += n
+        return out
+
+    def _mean(self, ext, depth, spec, day, kri):
+        w = spec.window
+        totals = sliding_window_view(ext[:, depth - w + 1:], w, axis=1).sum(axis=-1)
+        return totals / np.minimum(day + 1, w)
+
+    def _count(self, ext, depth, spec, day, kri):
+        w = spec.window
+        above = ext > spec.level
+        above[:, :max(0, depth - self.days)] = False
+        return sliding_window_view(above[:, depth - w + 1:], w, axis=1).sum(
+            axis=-1).astype(np.float64)
+
+    def _ewma(self, ext, depth, spec, day, kri):
+        alpha = 2.0 / (spec.window + 1)
+        values = ext[:, depth:]
+        out = np.empty_like(values)
+        level = self._levels.get(kri)
+        for i in range(values.shape[1]):
+            level = values[:, i] if level is None else (
+                alpha * values[:, i] + (1 - alpha) * level)
+            out[:, i] = level
+        self._levels[kri] = level
+        return out
+
+    def _zscore(self, ext, depth, spec, day, kri):
+        w = spec.window
+        base = ext[:, depth - w:-1]
+        s1 = sliding_window_view(base, w, axis=1).sum(axis=-1)
+        s2 = sliding_window_view(base * base, w, axis=1).sum(axis=-1)
+        mean = s1 / w
+        std = np.sqrt(np.maximum(s2 - s1 * mean, 0) / (w - 1))
+        ready = (day >= w) & (std > 1e-9)
+        z = np.zeros_like(mean)
+        np.divide(ext[:, depth:] - mean, std, out=z, where=ready)
+        return z
+
+
+def window_kris(df, kris, location_col='Location', date_col='Date'):
+    """Windowed ``kris`` for a frame with one row per location-day.
+
+    Rows are grouped by location and ordered by date; each location is
+    one contiguous array pass. Returns a frame aligned to ``df.index``.
+    """
+    codes, locations = pd.factorize(df[location_col], sort=False)
+    order = np.lexsort((df[date_col].to_numpy(), codes))
+    counts = np.bincount(codes, minlength=len(locations))
+    values = {source: df[source].to_numpy(dtype=np.float64)[order]
+              for source in window_sources(kris)}
+    result = {kri: np.empty(len(df)) for kri in kris}
+    if len(df) and counts.min() == counts.max():
+        shape = (len(locations), counts[0])
+        engine = RollingKRIs(kris, len(locations))
+        for kri, out in engine.update(
+                {s: v.reshape(shape) for s, v in values.items()}).items():
+            result[kri][order] = out.reshape(-1)
+    else:
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            engine = RollingKRIs(kris, 1)
+            for kri, out in engine.update(
+                    {s: v[start:stop] for s, v in values.items()}).items():
+                result[kri][order[start:stop]] = out.reshape(-1)
+    return pd.DataFrame(result, index=df.index, columns=list(kris))